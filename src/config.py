@@ -1,5 +1,7 @@
 """Configuration and constants for the Model Manager."""
 
+import importlib.metadata
+import importlib.util
 import os
 from pathlib import Path
 
@@ -21,8 +23,13 @@ GGUF_TAG = "gguf"
 MAX_SEARCH_RESULTS = 50
 # Note: MULTIPART_REGEX is defined in src/utils/helpers.py
 
-# Enable faster downloads (requires hf_transfer package)
-os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "1"
+# huggingface_hub < 1.0 can hand downloads to the optional hf_transfer backend
+# (pip install model-manager[fast]); 1.0 dropped it and warns when the variable is set.
+# Only opt in on those older hubs with the package installed, since forcing it on
+# without the package makes every download fail; setdefault keeps a user setting.
+_HUB_MAJOR_VERSION = int(importlib.metadata.version("huggingface_hub").split(".")[0])
+if _HUB_MAJOR_VERSION < 1 and importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
 
 # Update checking settings
 UPDATE_CHECK_TIMEOUT = 10  # seconds per model
@@ -1,6 +1,7 @@
 """Cache monitoring for HuggingFace Hub download progress."""
 
 import logging
+import os
 import time
 from pathlib import Path
 from typing import Optional, List, Tuple
@@ -166,20 +167,19 @@ class CacheMonitor:
         candidates = []
 
         # Priority 1: Final file exists
-        if self.target_file.exists():
-            candidates.append((self.target_file.stat().st_mtime, self.target_file.stat().st_size))
+        target = self._stat_target()
+        if target:
+            candidates.append(target)
 
         # Priority 2: Local cache incomplete files
-        if self.local_cache_download.exists():
-            for f in self.local_cache_download.glob("*.incomplete"):
-                candidates.append((f.stat().st_mtime, f.stat().st_size))
-                logger.info(f"Found local cache incomplete: {f.name} ({f.stat().st_size} bytes)")
+        for mtime, size, name in self._scan_incomplete(self.local_cache_download):
+            candidates.append((mtime, size))
+            logger.info(f"Found local cache incomplete: {name} ({size} bytes)")
 
         # Priority 3: Global cache incomplete files
-        if self.global_cache_download.exists():
-            for f in self.global_cache_download.glob("*.incomplete"):
-                candidates.append((f.stat().st_mtime, f.stat().st_size))
-                logger.info(f"Found global cache incomplete: {f.name} ({f.stat().st_size} bytes)")
+        for mtime, size, name in self._scan_incomplete(self.global_cache_download):
+            candidates.append((mtime, size))
+            logger.info(f"Found global cache incomplete: {name} ({size} bytes)")
 
         return candidates
 
@@ -193,25 +193,61 @@ class CacheMonitor:
         candidates = []
 
         # Priority 1: Check if final file exists and is growing
-        if self.target_file.exists():
-            candidates.append(
-                (
-                    self.target_file.stat().st_mtime,
-                    self.target_file.stat().st_size,
-                    "target_file",
-                )
-            )
+        target = self._stat_target()
+        if target:
+            candidates.append((target[0], target[1], "target_file"))
 
         # Priority 2: Check LOCAL cache for incomplete files
-        if self.local_cache_download.exists():
-            incomplete_files = list(self.local_cache_download.glob("*.incomplete"))
-            for f in incomplete_files:
-                candidates.append((f.stat().st_mtime, f.stat().st_size, f"local_cache ({f.name})"))
+        for mtime, size, name in self._scan_incomplete(self.local_cache_download):
+            candidates.append((mtime, size, f"local_cache ({name})"))
 
         # Priority 3: Check GLOBAL cache as fallback
-        if self.global_cache_download.exists():
-            incomplete_files = list(self.global_cache_download.glob("*.incomplete"))
-            for f in incomplete_files:
-                candidates.append((f.stat().st_mtime, f.stat().st_size, f"global_cache ({f.name})"))
+        for mtime, size, name in self._scan_incomplete(self.global_cache_download):
+            candidates.append((mtime, size, f"global_cache ({name})"))
 
         return candidates
+
+    def _stat_target(self) -> Optional[Tuple[float, int]]:
+        """
+        Stat the final target file once.
+
+        Returns:
+            Tuple of (modification_time, size), or None if the file doesn't exist
+        """
+        try:
+            st = os.stat(self.target_file)
+        except OSError:
+            return None
+        return st.st_mtime, st.st_size
+
+    @staticmethod
+    def _scan_incomplete(directory: Path) -> List[Tuple[float, int, str]]:
+        """
+        List incomplete download files in a directory with a single stat each.
+
+        Uses os.scandir so the directory is read once per poll and each entry
+        is stat'ed once, instead of exists() + glob() + separate stat() calls
+        for mtime and size.
+
+        Args:
+            directory: Cache download directory to scan
+
+        Returns:
+            List of (modification_time, size, filename) tuples
+        """
+        found = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".incomplete"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        # File was renamed or removed between listing and stat
+                        continue
+                    found.append((st.st_mtime, st.st_size, entry.name))
+        except OSError:
+            # Directory doesn't exist (yet)
+            pass
+        return found
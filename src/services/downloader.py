@@ -3,9 +3,11 @@
 import asyncio
 import hashlib
 import logging
+import re
 import shutil
 import time
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import List, Optional
 
@@ -13,7 +15,7 @@ from huggingface_hub import hf_hub_download
 
 from src.services.cache_monitor import CacheMonitor
 from src.utils.helpers import ProgressCallback, ProgressData, DownloadSpeedCalculator, calculate_eta
-from src.exceptions import DownloadError, HuggingFaceError
+from src.exceptions import DownloadError, HuggingFaceError, NetworkError
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,13 @@ logger = logging.getLogger(__name__)
 PROGRESS_HEARTBEAT_INTERVAL = 0.5  # seconds - send progress updates even when stalled
 PROGRESS_POLL_INTERVAL = 0.1  # seconds - how often to check file size
 SPEED_CALC_WINDOW_SIZE = 10  # samples - moving window for speed calculation
+DISK_USAGE_CACHE_TTL = 2.0  # seconds - reuse free-space probe across validations
+PROGRESS_MIN_EMIT_INTERVAL = 0.25  # seconds - coalesce progress callbacks closer than this
+PROGRESS_MIN_EMIT_BYTES = 1 << 20  # bytes - ...unless at least this much was downloaded
+
+# HuggingFace repository ID: "<owner>/<name>", each part up to 96 characters
+REPO_ID_REGEX = r"[A-Za-z0-9][A-Za-z0-9._-]{0,95}/[A-Za-z0-9][A-Za-z0-9._-]{0,95}"
+_REPO_ID_PATTERN = re.compile(REPO_ID_REGEX)
 
 
 class DownloadManager:
@@ -36,6 +45,9 @@ class DownloadManager:
         self._is_resuming = False
         self._initial_bytes_before = 0
         self._shutdown = False
+        self._disk_free_cache: Optional[tuple[float, int]] = None  # (timestamp, free bytes)
+        self._clock = time.monotonic  # Throttle/TTL clock; tests swap in a fake
+        self._reset_progress_throttle()
 
     def shutdown(self) -> None:
         """Shutdown the executor gracefully."""
@@ -72,11 +84,14 @@ class DownloadManager:
 
         # Initialize speed calculator for accurate real-time speed tracking
         self._speed_calculator = DownloadSpeedCalculator(window_size=SPEED_CALC_WINDOW_SIZE)
+        self._reset_progress_throttle()
+
+        # Build each file's destination path once; reused by the download loop below
+        file_paths = [local_dir / filename for filename in files]
 
         # Calculate initial bytes already downloaded (for resumed downloads)
         self._initial_bytes_before = 0
-        for filename in files:
-            file_path = local_dir / filename
+        for file_path in file_paths:
             if file_path.exists():
                 self._initial_bytes_before += file_path.stat().st_size
 
@@ -89,13 +104,25 @@ class DownloadManager:
             self._speed_calculator.update(self._initial_bytes_before)
 
         try:
+            # Resolve the commit once so every file comes from the same snapshot;
+            # hf_hub_download also skips the network for files already at that commit
+            logger.info(f"Fetching commit SHA for {repo_id}")
+            try:
+                commit_sha = self.hf_client.get_commit_sha(repo_id)
+            except NetworkError as e:
+                # Not worth failing the download over; fetch the latest revision instead
+                logger.warning(
+                    f"Could not resolve commit SHA for {repo_id}, downloading latest revision: {e}"
+                )
+                commit_sha = None
+
             for idx, filename in enumerate(files):
                 if self._cancelled:
                     logger.info("Download cancelled by user")
                     return False
 
                 file_size = file_sizes.get(filename, 0)
-                file_path = local_dir / filename
+                file_path = file_paths[idx]
 
                 # Check if file already exists
                 if file_path.exists():
@@ -149,6 +176,7 @@ class DownloadManager:
                             repo_id=repo_id,
                             filename=filename,
                             local_dir=local_dir,
+                            revision=commit_sha,
                             file_size=file_size,
                             file_idx=idx,
                             total_files=len(files),
@@ -195,11 +223,12 @@ class DownloadManager:
                             )
                             raise DownloadError(f"Failed to download {filename}: {e}") from e
 
-            # Get commit SHA and save metadata
-            logger.info(f"Fetching commit SHA for {repo_id}")
-            commit_sha = self.hf_client.get_commit_sha(repo_id)
+            # Save metadata for the snapshot the files were pinned to
             self.storage.save_model_metadata(repo_id, commit_sha)
 
+            # Free space changed, force the next validation to re-probe the disk
+            self._disk_free_cache = None
+
             # Final progress
             if progress_callback:
                 progress_data: ProgressData = {
@@ -240,6 +269,7 @@ class DownloadManager:
         repo_id: str,
         filename: str,
         local_dir: Path,
+        revision: Optional[str],
         file_size: int,
         file_idx: int,
         total_files: int,
@@ -249,15 +279,17 @@ class DownloadManager:
         progress_callback: Optional[ProgressCallback],
     ):
         """Download a file with byte-level progress monitoring."""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
         # Start download in background thread
         download_future = loop.run_in_executor(
             self._executor,
-            lambda: hf_hub_download(
+            partial(
+                hf_hub_download,
                 repo_id=repo_id,
                 filename=filename,
                 local_dir=str(local_dir),
+                revision=revision,
             ),
         )
 
@@ -281,14 +313,14 @@ class DownloadManager:
 
             # Send progress update if appropriate
             if progress_callback and cache_monitor.should_send_progress(current_size):
-                if current_size > 0:
+                if current_size > 0 and logger.isEnabledFor(logging.DEBUG):
                     logger.debug(
                         f"Progress update: {current_size}/{file_size} bytes "
                         f"({current_size/file_size*100:.1f}%) from {found_location} "
                         f"(new this session: {new_bytes_this_session:,})"
                     )
 
-                self._send_progress(
+                sent = self._send_progress(
                     progress_callback,
                     repo_id,
                     filename,
@@ -301,15 +333,23 @@ class DownloadManager:
                     start_time,
                 )
 
-                cache_monitor.update_tracking(current_size)
+                # A coalesced update is retried on the next poll rather than marked as sent
+                if sent:
+                    cache_monitor.update_tracking(current_size)
 
             # Log periodic monitoring status
             warning = cache_monitor.log_monitoring_status()
             if warning:
                 logger.warning(warning)
 
-            # Sleep briefly before next check
-            await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+            # Wait for the next check, waking immediately if the download finishes
+            await asyncio.wait({download_future}, timeout=PROGRESS_POLL_INTERVAL)
+
+        # A cancel that lands as the thread finishes must still win over its result
+        if self._cancelled:
+            if not download_future.cancelled():
+                download_future.exception()  # Mark retrieved; the outcome is discarded
+            raise asyncio.CancelledError("Download cancelled by user")
 
         # Wait for download to complete
         await download_future
@@ -330,8 +370,9 @@ class DownloadManager:
                 start_time,
             )
 
+    @staticmethod
     def _calculate_overall_downloaded(
-        self, current_size: int, initial_incomplete_size: int, overall_downloaded_before: int
+        current_size: int, initial_incomplete_size: int, overall_downloaded_before: int
     ) -> tuple[int, int]:
         """
         Calculate total bytes downloaded across all files.
@@ -349,11 +390,47 @@ class DownloadManager:
             Tuple of (overall_downloaded, new_bytes_this_session)
         """
         new_bytes_this_session = current_size - initial_incomplete_size
-        overall_downloaded = (
-            overall_downloaded_before + initial_incomplete_size + new_bytes_this_session
-        )
+        overall_downloaded = overall_downloaded_before + current_size
         return overall_downloaded, new_bytes_this_session
 
+    def _reset_progress_throttle(self) -> None:
+        """Reset progress coalescing state so the next update is always emitted."""
+        self._last_emit_time = 0.0
+        self._last_emit_bytes = 0
+        self._last_emit_file_idx = 0
+
+    def _should_emit_progress(
+        self, file_idx: int, file_downloaded: int, file_total: int, overall_downloaded: int
+    ) -> bool:
+        """
+        Decide whether a progress update is worth sending to the callback.
+
+        Updates are coalesced: a new file or a finished file is always reported,
+        otherwise at least PROGRESS_MIN_EMIT_INTERVAL seconds or
+        PROGRESS_MIN_EMIT_BYTES bytes must have passed since the last one.
+
+        Args:
+            file_idx: 1-based index of the current file
+            file_downloaded: Bytes downloaded of the current file
+            file_total: Total bytes of the current file
+            overall_downloaded: Bytes downloaded across all files
+
+        Returns:
+            True if the update should be sent
+        """
+        now = self._clock()
+        if (
+            file_idx != self._last_emit_file_idx
+            or file_downloaded >= file_total
+            or now - self._last_emit_time >= PROGRESS_MIN_EMIT_INTERVAL
+            or overall_downloaded - self._last_emit_bytes >= PROGRESS_MIN_EMIT_BYTES
+        ):
+            self._last_emit_time = now
+            self._last_emit_bytes = overall_downloaded
+            self._last_emit_file_idx = file_idx
+            return True
+        return False
+
     def _send_progress(
         self,
         callback,
@@ -366,10 +443,22 @@ class DownloadManager:
         overall_downloaded,
         overall_total,
         start_time,
-    ):
-        """Send progress update to callback with calculated speed and ETA."""
+    ) -> bool:
+        """
+        Send progress update to callback with calculated speed and ETA.
+
+        Returns:
+            True if the update was sent, False if it was coalesced away
+        """
         # Use speed calculator for accurate real-time speed (moving window average)
         speed = self._speed_calculator.update(overall_downloaded) if self._speed_calculator else 0
+
+        # Coalesce rapid updates; the dict is only built for updates that are sent
+        if not self._should_emit_progress(
+            file_idx, file_downloaded, file_total, overall_downloaded
+        ):
+            return False
+
         remaining = overall_total - overall_downloaded
         eta = calculate_eta(remaining, speed)
 
@@ -393,11 +482,14 @@ class DownloadManager:
             "completed": False,
         }
 
-        logger.debug(
-            f"Progress: {filename} - {file_downloaded}/{file_total} bytes "
-            f"(overall: {overall_downloaded}/{overall_total})"
-        )
+        # Skip building the f-string on every update unless debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Progress: {filename} - {file_downloaded}/{file_total} bytes "
+                f"(overall: {overall_downloaded}/{overall_total})"
+            )
         callback(progress_data)
+        return True
 
     def cancel_download(self):
         """Cancel the current download."""
@@ -459,15 +551,40 @@ class DownloadManager:
                 f"Checksum mismatch for {file_path.name}. " f"File may be corrupted."
             )
 
+    def _get_free_space(self) -> int:
+        """
+        Get free bytes on the models filesystem.
+
+        The result is cached for DISK_USAGE_CACHE_TTL seconds so that validating
+        several models in a row issues a single disk usage syscall.
+
+        Returns:
+            Number of free bytes
+        """
+        now = self._clock()
+        if self._disk_free_cache is not None:
+            checked_at, free = self._disk_free_cache
+            if now - checked_at < DISK_USAGE_CACHE_TTL:
+                return free
+
+        free = shutil.disk_usage(self.storage.models_dir).free
+        self._disk_free_cache = (now, free)
+        return free
+
     async def validate_download(
         self, repo_id: str, files: List[str], total_size: int
     ) -> tuple[bool, str]:
         """Validate download can proceed."""
         try:
+            # Cheap input checks first, so malformed requests never touch the disk
+            if not files:
+                return False, "No files specified for download"
+
+            if not _REPO_ID_PATTERN.fullmatch(repo_id):
+                return False, f"Invalid repository ID format: {repo_id}"
+
             # Check disk space on models directory (always exists)
-            models_dir = self.storage.models_dir
-            stat = shutil.disk_usage(models_dir)
-            available_space = stat.free
+            available_space = self._get_free_space()
 
             # Require 10% buffer
             required_space = int(total_size * 1.1)
@@ -479,12 +596,6 @@ class DownloadManager:
                     f"have {available_space / 1024 / 1024 / 1024:.2f} GB available"
                 )
 
-            if not files:
-                return False, "No files specified for download"
-
-            if "/" not in repo_id:
-                return False, f"Invalid repository ID format: {repo_id}"
-
             logger.info(f"Download validation passed for {repo_id}")
             return True, ""
 
@@ -1,6 +1,7 @@
 """HuggingFace API client wrapper."""
 
 import logging
+import re
 import time
 from typing import Any, TypeVar
 
@@ -13,6 +14,9 @@ logger = logging.getLogger(__name__)
 # Type variable for cached values
 T = TypeVar("T")
 
+# Case-insensitive .gguf extension; avoids lower()-copying every filename in a repo
+_GGUF_PATTERN = re.compile(r"\.gguf\Z", re.IGNORECASE)
+
 
 class HuggingFaceClient:
     """
@@ -193,7 +197,7 @@ class HuggingFaceClient:
 
         try:
             files = self.api.list_repo_files(repo_id)
-            gguf_files = [f for f in files if f.lower().endswith(".gguf")]
+            gguf_files = [f for f in files if _GGUF_PATTERN.search(f)]
             logger.info(f"Found {len(gguf_files)} GGUF files in {repo_id}")
             self._set_cache(cache_key, gguf_files)
             return gguf_files
@@ -2,6 +2,7 @@
 
 import json
 import logging
+import os
 import shutil
 from datetime import datetime
 from pathlib import Path
@@ -9,9 +10,54 @@ from typing import Any
 
 from src.exceptions import StorageError
 
+try:
+    # Optional faster JSON backend (pip install model-manager[fast])
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _dump_metadata(metadata: dict[str, dict[str, Any]]) -> bytes:
+    """
+    Serialize metadata to indented JSON bytes, using orjson when available.
+
+    orjson rejects some values the stdlib accepts (non-str keys, integers wider
+    than 64 bits); those fall back to the stdlib encoder.
+
+    Args:
+        metadata: Metadata dictionary to serialize
+
+    Returns:
+        UTF-8 encoded JSON document
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass
+    return json.dumps(metadata, indent=2).encode()
+
+
+def _load_metadata_bytes(data: bytes) -> dict[str, dict[str, Any]]:
+    """
+    Parse metadata JSON bytes, using orjson when available.
+
+    Args:
+        data: Raw contents of the metadata file
+
+    Returns:
+        Parsed metadata dictionary
+
+    Raises:
+        json.JSONDecodeError: If the data is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class StorageManager:
     """
     Manages local model storage and metadata.
@@ -59,43 +105,61 @@ class StorageManager:
             return models
 
         # Scan directory structure: models/author/model_name/
-        for author_dir in self.models_dir.iterdir():
-            if not author_dir.is_dir() or author_dir.name.startswith("."):
-                continue
-
-            for model_dir in author_dir.iterdir():
-                if not model_dir.is_dir():
+        # DirEntry.is_dir() uses the file type from the listing, so only GGUF files are stat'ed
+        with os.scandir(self.models_dir) as author_entries:
+            for author_entry in author_entries:
+                if author_entry.name.startswith(".") or not author_entry.is_dir():
                     continue
 
-                repo_id = f"{author_dir.name}/{model_dir.name}"
-                gguf_files = [f.name for f in model_dir.iterdir() if f.name.endswith(".gguf")]
+                with os.scandir(author_entry.path) as model_entries:
+                    for model_entry in model_entries:
+                        if not model_entry.is_dir():
+                            continue
 
-                if not gguf_files:
-                    continue
+                        gguf_files, total_size = self._scan_gguf_files(model_entry.path)
+                        if not gguf_files:
+                            continue
 
-                # Get total size
-                total_size = sum(
-                    f.stat().st_size for f in model_dir.iterdir() if f.name.endswith(".gguf")
-                )
-
-                # Get metadata for this model
-                meta = self.metadata.get(repo_id, {})
-
-                models.append(
-                    {
-                        "repo_id": repo_id,
-                        "path": str(model_dir),
-                        "files": sorted(gguf_files),
-                        "total_size": total_size,
-                        "download_date": meta.get("download_date"),
-                        "commit_sha": meta.get("commit_sha"),
-                        "update_status": "unknown",
-                    }
-                )
+                        repo_id = f"{author_entry.name}/{model_entry.name}"
+
+                        # Get metadata for this model
+                        meta = self.metadata.get(repo_id, {})
+
+                        models.append(
+                            {
+                                "repo_id": repo_id,
+                                "path": model_entry.path,
+                                "files": sorted(gguf_files),
+                                "total_size": total_size,
+                                "download_date": meta.get("download_date"),
+                                "commit_sha": meta.get("commit_sha"),
+                                "update_status": "unknown",
+                            }
+                        )
 
         logger.info(f"Found {len(models)} local models")
         return models
 
+    @staticmethod
+    def _scan_gguf_files(model_dir: str) -> tuple[list[str], int]:
+        """
+        List a model directory's GGUF files and their total size in one pass.
+
+        Args:
+            model_dir: Path of the model directory
+
+        Returns:
+            Tuple of (GGUF filenames, total size in bytes)
+        """
+        gguf_files = []
+        total_size = 0
+        with os.scandir(model_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".gguf"):
+                    gguf_files.append(entry.name)
+                    total_size += entry.stat().st_size
+        return gguf_files, total_size
+
     def get_model_path(self, repo_id: str) -> Path:
         """
         Get the path where a model should be stored.
@@ -226,8 +290,7 @@ class StorageManager:
         """
         if self.metadata_file.exists():
             try:
-                with open(self.metadata_file, "r") as f:
-                    return json.load(f)
+                return _load_metadata_bytes(self.metadata_file.read_bytes())
             except json.JSONDecodeError as e:
                 logger.error(f"Invalid JSON in metadata file: {e}", exc_info=True)
                 return {}
@@ -245,8 +308,7 @@ class StorageManager:
         """
         try:
             self.metadata_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.metadata_file, "w") as f:
-                json.dump(self.metadata, f, indent=2)
+            self.metadata_file.write_bytes(_dump_metadata(self.metadata))
         except PermissionError as e:
             logger.error(f"Permission denied saving metadata: {e}", exc_info=True)
             raise StorageError(f"Permission denied: {e}") from e
@@ -1,7 +1,10 @@
 """Helper utility functions."""
 
+import math
 import re
 import time
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, List, Optional, Tuple, TypedDict, Callable
 
 
@@ -32,23 +35,50 @@ ProgressCallback = Callable[[ProgressData], None]
 
 # Regex pattern for multipart GGUF files
 MULTIPART_REGEX = r"(.+)-(\d{1,5})-of-(\d{1,5})\.gguf$"
+_MULTIPART_PATTERN = re.compile(MULTIPART_REGEX)
 
 
+# Binary size units and their divisors, indexed by bit_length() // 10
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+_UNIT_DIVISORS = tuple(1024.0**i for i in range(len(_SIZE_UNITS)))
+
+
+def _unit_index(value: float, max_index: int) -> int:
+    """
+    Pick the largest binary unit that keeps the value at or above 1.
+
+    Args:
+        value: Amount of at least 1024, or NaN/infinity
+        max_index: Largest unit index to return
+
+    Returns:
+        Index into _SIZE_UNITS / _UNIT_DIVISORS; max_index for NaN or infinity
+    """
+    # NaN/inf can't go through int(); the largest unit keeps the old "inf PB" output
+    if not math.isfinite(value):
+        return max_index
+    return min((int(value).bit_length() - 1) // 10, max_index)
+
+
+@lru_cache(maxsize=1024)
 def format_size(bytes_size: float) -> str:
     """
     Format bytes into human-readable size.
 
+    Results are memoized on the exact value: totals such as the overall and
+    per-file sizes are re-formatted on every progress update and model list
+    refresh without changing.
+
     Args:
         bytes_size: Size in bytes
 
     Returns:
         Formatted string (e.g., "4.2 GB")
     """
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.1f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.1f} PB"
+    if bytes_size < 1024:
+        return f"{bytes_size:.1f} B"
+    i = _unit_index(bytes_size, 5)
+    return f"{bytes_size / _UNIT_DIVISORS[i]:.1f} {_SIZE_UNITS[i]}"
 
 
 def format_speed(bytes_per_sec: float) -> str:
@@ -63,12 +93,10 @@ def format_speed(bytes_per_sec: float) -> str:
     """
     if bytes_per_sec == 0:
         return "0 B/s"
-
-    for unit in ["B/s", "KB/s", "MB/s", "GB/s"]:
-        if bytes_per_sec < 1024.0:
-            return f"{bytes_per_sec:.1f} {unit}"
-        bytes_per_sec /= 1024.0
-    return f"{bytes_per_sec:.1f} TB/s"
+    if bytes_per_sec < 1024:
+        return f"{bytes_per_sec:.1f} B/s"
+    i = _unit_index(bytes_per_sec, 4)
+    return f"{bytes_per_sec / _UNIT_DIVISORS[i]:.1f} {_SIZE_UNITS[i]}/s"
 
 
 def format_time(seconds: float) -> str:
@@ -89,21 +117,17 @@ def format_time(seconds: float) -> str:
     if seconds < 60:
         return f"{seconds}s"
 
-    minutes = seconds // 60
-    secs = seconds % 60
-
-    if minutes < 60:
+    # Each branch does a single divmod on the total instead of cascading // and %
+    if seconds < 3600:
+        minutes, secs = divmod(seconds, 60)
         return f"{minutes}m {secs}s"
 
-    hours = minutes // 60
-    mins = minutes % 60
-
-    if hours < 24:
-        return f"{hours}h {mins}m"
+    if seconds < 86400:
+        hours, rest = divmod(seconds, 3600)
+        return f"{hours}h {rest // 60}m"
 
-    days = hours // 24
-    hrs = hours % 24
-    return f"{days}d {hrs}h"
+    days, rest = divmod(seconds, 86400)
+    return f"{days}d {rest // 3600}h"
 
 
 def parse_multipart_filename(filename: str) -> Optional[Tuple[str, int, int]]:
@@ -119,7 +143,11 @@ def parse_multipart_filename(filename: str) -> Optional[Tuple[str, int, int]]:
     Example:
         "model-Q4_K_M-00001-of-00005.gguf" -> ("model-Q4_K_M", 1, 5)
     """
-    match = re.match(MULTIPART_REGEX, filename)
+    # Cheap suffix check first; most non-multipart names never reach the regex
+    if not filename.endswith(".gguf"):
+        return None
+
+    match = _MULTIPART_PATTERN.match(filename)
     if match:
         base_name = match.group(1)
         part_num = int(match.group(2))
@@ -147,27 +175,39 @@ def group_multipart_files(files: List[str]) -> Dict[str, List[str]]:
          "other-Q5_K_S.gguf": ["other-Q5_K_S.gguf"]}
     """
     groups: Dict[str, List[str]] = {}
+    numbered_parts: Dict[str, List[Tuple[int, str]]] = {}
 
     for file in files:
         parsed = parse_multipart_filename(file)
         if parsed:
-            base_name, _, _ = parsed
-            if base_name not in groups:
-                groups[base_name] = []
-            groups[base_name].append(file)
+            base_name, part_num, _ = parsed
+            if base_name not in numbered_parts:
+                numbered_parts[base_name] = []
+                groups[base_name] = []  # Reserve slot to keep first-seen order
+            numbered_parts[base_name].append((part_num, file))
         else:
             # Single file, use full name as key
             groups[file] = [file]
 
-    # Sort files within each group
-    for key in groups:
-        groups[key] = sorted(groups[key])
+    # Sort each multipart group once by its already-parsed part number; keying on
+    # the int alone avoids falling back to filename comparison on tuple ties
+    by_part = itemgetter(0)
+    for base_name, numbered in numbered_parts.items():
+        numbered.sort(key=by_part)
+        groups[base_name] = [file for _, file in numbered]
 
     return groups
 
 
 class DownloadSpeedCalculator:
-    """Calculate download speed with moving average."""
+    """
+    Calculate download speed with moving average.
+
+    Samples are kept in a fixed-size ring buffer (parallel timestamp and byte
+    arrays plus a write index), so updates are O(1) and allocate nothing.
+    Timestamps are integer nanoseconds from time.monotonic_ns(), so sample
+    deltas are exact and unaffected by wall-clock adjustments.
+    """
 
     def __init__(self, window_size: int = 10):
         """
@@ -175,12 +215,42 @@ class DownloadSpeedCalculator:
 
         Args:
             window_size: Number of samples for moving average
+
+        Raises:
+            ValueError: If window_size is less than 1
         """
+        if window_size < 1:
+            raise ValueError(f"window_size must be at least 1, got {window_size}")
         self.window_size = window_size
-        self.samples: List[Tuple[float, int]] = []  # (timestamp, bytes)
+        self._times: List[int] = [0] * window_size
+        self._bytes: List[int] = [0] * window_size
+        self._head = 0  # Next slot to write
+        self._count = 0  # Number of valid samples
         self.start_time = time.time()
         self.start_bytes = 0
 
+    @property
+    def sample_count(self) -> int:
+        """Number of samples currently held in the moving window."""
+        return self._count
+
+    def _deltas(self, span: int) -> Tuple[int, int]:
+        """
+        Get elapsed time and bytes between the newest sample and the one ``span - 1`` slots older.
+
+        Args:
+            span: Number of most recent samples to cover (at least 2)
+
+        Returns:
+            Tuple of (nanoseconds elapsed, bytes gained)
+        """
+        newest = (self._head - 1) % self.window_size
+        oldest = (self._head - span) % self.window_size
+        return (
+            self._times[newest] - self._times[oldest],
+            self._bytes[newest] - self._bytes[oldest],
+        )
+
     def update(self, current_bytes: int) -> float:
         """
         Update with current byte count and get current speed.
@@ -191,49 +261,38 @@ class DownloadSpeedCalculator:
         Returns:
             Current speed in bytes per second
         """
-        current_time = time.time()
-        self.samples.append((current_time, current_bytes))
-
-        # Keep only recent samples
-        if len(self.samples) > self.window_size:
-            self.samples.pop(0)
+        i = self._head
+        self._times[i] = time.monotonic_ns()
+        self._bytes[i] = current_bytes
+        self._head = (i + 1) % self.window_size
+        if self._count < self.window_size:
+            self._count += 1
 
         # Need at least 2 samples to calculate speed
-        if len(self.samples) < 2:
+        if self._count < 2:
             return 0.0
 
-        # Calculate speed from last few samples (more responsive)
-        # Use last half of window for current speed
-        recent_samples = self.samples[-(min(len(self.samples), self.window_size // 2)) :]
-        if len(recent_samples) < 2:
-            recent_samples = self.samples
+        # Use last half of window for current speed (more responsive)
+        recent = min(self._count, self.window_size // 2)
+        if recent < 2:
+            recent = self._count
 
-        first_time, first_bytes = recent_samples[0]
-        last_time, last_bytes = recent_samples[-1]
-
-        time_diff = last_time - first_time
-        if time_diff == 0:
+        time_diff, bytes_diff = self._deltas(recent)
+        if time_diff <= 0:
             return 0.0
 
-        bytes_diff = last_bytes - first_bytes
-
-        # Filter out zero or negative byte changes (stalled download)
+        # Zero or negative byte change (stalled download) - use all samples instead
         if bytes_diff <= 0:
-            # Try using all samples for better estimate
-            first_time_all, first_bytes_all = self.samples[0]
-            last_time_all, last_bytes_all = self.samples[-1]
-            time_diff_all = last_time_all - first_time_all
-            if time_diff_all > 0:
-                bytes_diff_all = last_bytes_all - first_bytes_all
-                if bytes_diff_all > 0:
-                    return bytes_diff_all / time_diff_all
-            return 0.0
+            time_diff, bytes_diff = self._deltas(self._count)
+            if time_diff <= 0 or bytes_diff <= 0:
+                return 0.0
 
-        return bytes_diff / time_diff
+        return bytes_diff * 1_000_000_000 / time_diff
 
     def reset(self):
         """Reset the speed calculator."""
-        self.samples.clear()
+        self._head = 0
+        self._count = 0
         self.start_time = time.time()
 
 
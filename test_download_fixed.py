@@ -7,9 +7,6 @@ This tests the fixes for the stuck-at-0% issue.
 import asyncio
 import logging
 import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).parent))
 
 from src.services.downloader import DownloadManager
 from src.services.hf_client import HuggingFaceClient
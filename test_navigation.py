@@ -2,9 +2,6 @@
 """Test script to verify navigation flow improvements."""
 
 import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).parent))
 
 from src.screens.detail_screen import DetailScreen
 from textual.widgets import DataTable
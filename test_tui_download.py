@@ -8,10 +8,6 @@ import asyncio
 import logging
 import sys
 import time
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent))
 
 from src.services.hf_client import HuggingFaceClient
 from src.services.storage import StorageManager
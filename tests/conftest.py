@@ -0,0 +1,28 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+
+class FakeClock:
+    """Stand-in for time.monotonic_ns that advances a fixed step per reading."""
+
+    def __init__(self, step_ns: int = 10_000_000):
+        self.now_ns = 0
+        self.step_ns = step_ns
+
+    def __call__(self) -> int:
+        reading = self.now_ns
+        self.now_ns += self.step_ns
+        return reading
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Advance the speed calculator's clock 10 ms per reading instead of sleeping.
+
+    Tests can change ``step_ns`` between readings, e.g. 0 to take two samples at
+    the same instant.
+    """
+    clock = FakeClock()
+    monkeypatch.setattr("src.utils.helpers.time.monotonic_ns", clock)
+    return clock
@@ -0,0 +1,59 @@
+"""Tests for cache monitor."""
+
+import pytest
+import shutil
+import tempfile
+from pathlib import Path
+
+from src.services.cache_monitor import CacheMonitor
+
+
+class TestCacheMonitor:
+    """Test suite for CacheMonitor size discovery."""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for tests."""
+        tmpdir = tempfile.mkdtemp()
+        yield Path(tmpdir)
+        shutil.rmtree(tmpdir)
+
+    @pytest.fixture
+    def monitor(self, temp_dir):
+        """Create a cache monitor isolated from the real global cache."""
+        monitor = CacheMonitor(temp_dir, "model.gguf")
+        monitor.global_cache_download = temp_dir / "global" / "download"
+        return monitor
+
+    def test_no_files_yet(self, monitor):
+        """Test that monitoring before any file appears reports zero."""
+        assert monitor.get_current_size() == (0, None)
+        assert monitor.get_initial_incomplete_size() == 0
+
+    def test_local_incomplete_file(self, monitor):
+        """Test that an incomplete file in the local cache is picked up."""
+        monitor.local_cache_download.mkdir(parents=True)
+        (monitor.local_cache_download / "abc.etag.incomplete").write_bytes(b"x" * 512)
+        (monitor.local_cache_download / "abc.lock").write_bytes(b"")
+
+        size, location = monitor.get_current_size()
+
+        assert size == 512
+        assert location == "local_cache (abc.etag.incomplete)"
+
+    def test_target_file(self, monitor, temp_dir):
+        """Test that the final target file is reported once it exists."""
+        (temp_dir / "model.gguf").write_bytes(b"x" * 1024)
+
+        assert monitor.get_current_size() == (1024, "target_file")
+
+    def test_initial_incomplete_size(self, monitor):
+        """Test that an existing incomplete file is treated as resumed bytes."""
+        monitor.global_cache_download.mkdir(parents=True)
+        (monitor.global_cache_download / "abc.etag.incomplete").write_bytes(b"x" * 256)
+
+        assert monitor.get_initial_incomplete_size() == 256
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -7,10 +7,6 @@ import shutil
 from pathlib import Path
 from unittest.mock import Mock
 
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.services.downloader import DownloadManager
 
 
@@ -207,7 +203,7 @@ class TestChecksumIntegration:
         files = ["test.gguf"]
 
         # Mock hf_hub_download to create a file
-        def mock_download(repo_id, filename, local_dir):
+        def mock_download(repo_id, filename, local_dir, revision=None):
             file_path = Path(local_dir) / filename
             file_path.write_bytes(b"x" * 1024)
             return str(file_path)
@@ -6,10 +6,6 @@ import tempfile
 import shutil
 from pathlib import Path
 
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.services.config_manager import ConfigManager, DEFAULT_MODELS_DIR
 from src.exceptions import StorageError
 
@@ -6,10 +6,6 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.services.download_history import DownloadHistory, DownloadRecord
 
 
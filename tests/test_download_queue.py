@@ -4,11 +4,6 @@ import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
-from pathlib import Path
-
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.services.download_queue import DownloadQueueManager, DownloadTask, DownloadPriority
 
@@ -1,15 +1,10 @@
 """Tests for download manager."""
 
 import asyncio
+import itertools
 import pytest
-from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
-import tempfile
-import shutil
-
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.services.downloader import DownloadManager
 from src.utils.helpers import ProgressData, DownloadSpeedCalculator, calculate_eta
@@ -18,14 +13,16 @@ from src.utils.helpers import ProgressData, DownloadSpeedCalculator, calculate_e
 class TestDownloadManager:
     """Test suite for DownloadManager."""
 
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for tests."""
-        tmpdir = tempfile.mkdtemp()
-        yield Path(tmpdir)
-        shutil.rmtree(tmpdir)
+    @pytest.fixture(scope="class")
+    def temp_dir(self, tmp_path_factory):
+        """Create a temporary directory for tests.
 
-    @pytest.fixture
+        Uses pytest's managed temp root (tmp_path_factory, since the fixture is
+        class-scoped) so cleanup is left to pytest's retention policy.
+        """
+        return tmp_path_factory.mktemp("downloader")
+
+    @pytest.fixture(scope="class")
     def mock_hf_client(self):
         """Create a mock HuggingFace client."""
         client = Mock()
@@ -33,7 +30,7 @@ class TestDownloadManager:
         client.get_commit_sha = Mock(return_value="abc123")
         return client
 
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_storage(self, temp_dir):
         """Create a mock storage manager."""
         storage = Mock()
@@ -44,8 +41,14 @@ class TestDownloadManager:
 
     @pytest.fixture
     def downloader(self, mock_hf_client, mock_storage):
-        """Create a DownloadManager instance."""
-        return DownloadManager(mock_hf_client, mock_storage)
+        """Create a fresh DownloadManager per test on top of the class-scoped mocks.
+
+        The executor only starts its worker thread on first submit, so a new
+        instance is cheap and no per-download state carries over between tests.
+        """
+        manager = DownloadManager(mock_hf_client, mock_storage)
+        yield manager
+        manager.shutdown()
 
     def test_initialization(self, downloader):
         """Test DownloadManager initialization."""
@@ -75,13 +78,38 @@ class TestDownloadManager:
         assert "Invalid repository ID" in msg
 
     @pytest.mark.asyncio
-    async def test_validate_download_insufficient_space(self, downloader):
+    @pytest.mark.parametrize(
+        "repo_id", ["author/", "/model", "a/b/c", "author/model name", "-author/model"]
+    )
+    async def test_validate_download_malformed_repo(self, downloader, repo_id):
+        """Test validation rejects repo IDs that aren't a single owner/name pair."""
+        valid, msg = await downloader.validate_download(repo_id, ["test.gguf"], 1024)
+        assert valid is False
+        assert "Invalid repository ID" in msg
+
+    @pytest.mark.asyncio
+    async def test_validate_download_insufficient_space(self, downloader, monkeypatch):
         """Test validation with insufficient disk space."""
-        # Use a huge file size that's definitely larger than available space
+        # Report a fixed tiny filesystem so the check doesn't depend on the host disk
+        monkeypatch.setattr(
+            "shutil.disk_usage", lambda path: SimpleNamespace(total=1000, used=500, free=500)
+        )
         valid, msg = await downloader.validate_download("test/model", ["test.gguf"], 10**15)  # 1 PB
         assert valid is False
         assert "Insufficient disk space" in msg
 
+    @pytest.mark.asyncio
+    async def test_validate_download_caches_disk_usage(self, downloader, monkeypatch):
+        """Test that back-to-back validations reuse one disk usage probe."""
+        probe = Mock(return_value=SimpleNamespace(total=10**12, used=0, free=10**12))
+        monkeypatch.setattr("shutil.disk_usage", probe)
+
+        for _ in range(3):
+            valid, _ = await downloader.validate_download("test/model", ["test.gguf"], 1024)
+            assert valid is True
+
+        assert probe.call_count == 1
+
     def test_progress_data_structure(self, downloader):
         """Test progress callback data structure."""
         callback_data = None
@@ -143,6 +171,38 @@ class TestDownloadManager:
         assert callback_data["status"] == "resuming"
         assert callback_data["initial_bytes"] == 1024 * 1024
 
+    def test_progress_updates_coalesced(self, downloader):
+        """Test that rapid small progress updates for the same file are coalesced."""
+        # Each reading of the manager's clock is 100 ms after the last
+        downloader._clock = itertools.count(1000.0, 0.1).__next__
+        updates = []
+
+        sent = [
+            downloader._send_progress(
+                updates.append,
+                "test/model",
+                "test.gguf",
+                1,
+                1,
+                downloaded,
+                1024,
+                downloaded,
+                1024,
+                0.0,
+            )
+            for downloaded in (0, 100, 200, 300)
+        ]
+
+        # Updates within PROGRESS_MIN_EMIT_INTERVAL of the last one sent are dropped
+        assert sent == [True, False, False, True]
+        assert [u["current_file_downloaded"] for u in updates] == [0, 300]
+
+        # Completing the file is always reported, even inside the interval
+        assert downloader._send_progress(
+            updates.append, "test/model", "test.gguf", 1, 1, 1024, 1024, 1024, 1024, 0.0
+        )
+        assert updates[-1]["current_file_downloaded"] == 1024
+
     def test_cancel_download(self, downloader):
         """Test download cancellation."""
         assert not downloader._cancelled
@@ -324,7 +384,7 @@ class TestDownloadSpeedCalculator:
         """Test speed calculator initialization."""
         calc = DownloadSpeedCalculator(window_size=10)
         assert calc.window_size == 10
-        assert len(calc.samples) == 0
+        assert calc.sample_count == 0
 
     def test_speed_calculator_single_sample(self):
         """Test speed calculator with single sample."""
@@ -332,19 +392,16 @@ class TestDownloadSpeedCalculator:
         speed = calc.update(1024)
         assert speed == 0.0  # Need at least 2 samples
 
-    def test_speed_calculator_multiple_samples(self):
+    def test_speed_calculator_multiple_samples(self, fake_clock):
         """Test speed calculator with multiple samples."""
-        import time
-
         calc = DownloadSpeedCalculator(window_size=5)
 
-        # Simulate downloading 1 KB per update with small delays
+        # Simulate downloading 1 KB per 10 ms clock tick
         bytes_downloaded = 0
         speed = 0.0
         for i in range(5):
             bytes_downloaded += 1024
             speed = calc.update(bytes_downloaded)
-            time.sleep(0.01)  # Small delay between updates
 
         # Speed should be positive (bytes per second)
         assert speed > 0
@@ -358,17 +415,17 @@ class TestDownloadSpeedCalculator:
             calc.update(i * 1024)
 
         # Should only keep last 3 samples
-        assert len(calc.samples) <= 3
+        assert calc.sample_count <= 3
 
     def test_speed_calculator_reset(self):
         """Test speed calculator reset."""
         calc = DownloadSpeedCalculator()
         calc.update(1024)
         calc.update(2048)
-        assert len(calc.samples) > 0
+        assert calc.sample_count > 0
 
         calc.reset()
-        assert len(calc.samples) == 0
+        assert calc.sample_count == 0
 
 
 if __name__ == "__main__":
@@ -1,12 +1,6 @@
 """Tests for helper utilities."""
 
-import time
 import pytest
-from pathlib import Path
-
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.utils.helpers import (
     format_size,
@@ -22,103 +16,112 @@ from src.utils.helpers import (
 class TestFormatSize:
     """Test suite for format_size function."""
 
-    def test_format_bytes(self):
-        """Test formatting bytes."""
-        assert format_size(0) == "0.0 B"
-        assert format_size(512) == "512.0 B"
-        assert format_size(1023) == "1023.0 B"
-
-    def test_format_kilobytes(self):
-        """Test formatting kilobytes."""
-        assert format_size(1024) == "1.0 KB"
-        assert format_size(1536) == "1.5 KB"
-        assert format_size(10240) == "10.0 KB"
-
-    def test_format_megabytes(self):
-        """Test formatting megabytes."""
-        assert format_size(1024 * 1024) == "1.0 MB"
-        assert format_size(1024 * 1024 * 5.5) == "5.5 MB"
-        assert format_size(1024 * 1024 * 100) == "100.0 MB"
-
-    def test_format_gigabytes(self):
-        """Test formatting gigabytes."""
-        assert format_size(1024**3) == "1.0 GB"
-        assert format_size(1024**3 * 7.2) == "7.2 GB"
+    @pytest.mark.parametrize(
+        "size, expected",
+        [
+            # Bytes
+            (0, "0.0 B"),
+            (512, "512.0 B"),
+            (1023, "1023.0 B"),
+            # Kilobytes
+            (1024, "1.0 KB"),
+            (1536, "1.5 KB"),
+            (10240, "10.0 KB"),
+            # Megabytes
+            (1024 * 1024, "1.0 MB"),
+            (1024 * 1024 * 5.5, "5.5 MB"),
+            (1024 * 1024 * 100, "100.0 MB"),
+            # Gigabytes
+            (1024**3, "1.0 GB"),
+            (1024**3 * 7.2, "7.2 GB"),
+            # Terabytes
+            (1024**4, "1.0 TB"),
+            (1024**4 * 2.5, "2.5 TB"),
+            # Petabytes
+            (1024**5, "1.0 PB"),
+            # Non-finite values from progress math
+            (float("nan"), "nan PB"),
+            (float("inf"), "inf PB"),
+            (float("-inf"), "-inf B"),
+        ],
+    )
+    def test_format_size(self, size, expected):
+        """Test formatting sizes across all units."""
+        assert format_size(size) == expected
+
+    def test_format_repeated_value_cached(self):
+        """Test that re-formatting an unchanged total is served from the cache."""
+        format_size.cache_clear()
 
-    def test_format_terabytes(self):
-        """Test formatting terabytes."""
-        assert format_size(1024**4) == "1.0 TB"
-        assert format_size(1024**4 * 2.5) == "2.5 TB"
+        assert format_size(1024**3 * 7.2) == "7.2 GB"
+        assert format_size(1024**3 * 7.2) == "7.2 GB"
 
-    def test_format_petabytes(self):
-        """Test formatting petabytes."""
-        assert format_size(1024**5) == "1.0 PB"
+        assert format_size.cache_info().hits == 1
 
 
 class TestFormatSpeed:
     """Test suite for format_speed function."""
 
-    def test_format_zero_speed(self):
-        """Test formatting zero speed."""
-        assert format_speed(0) == "0 B/s"
-
-    def test_format_bytes_per_second(self):
-        """Test formatting bytes per second."""
-        assert format_speed(512) == "512.0 B/s"
-        assert format_speed(1000) == "1000.0 B/s"
-
-    def test_format_kilobytes_per_second(self):
-        """Test formatting KB/s."""
-        assert format_speed(1024) == "1.0 KB/s"
-        assert format_speed(1024 * 500) == "500.0 KB/s"
-
-    def test_format_megabytes_per_second(self):
-        """Test formatting MB/s."""
-        assert format_speed(1024 * 1024) == "1.0 MB/s"
-        assert format_speed(1024 * 1024 * 10) == "10.0 MB/s"
-        assert format_speed(1024 * 1024 * 100) == "100.0 MB/s"
-
-    def test_format_gigabytes_per_second(self):
-        """Test formatting GB/s."""
-        assert format_speed(1024**3) == "1.0 GB/s"
+    @pytest.mark.parametrize(
+        "speed, expected",
+        [
+            # Zero
+            (0, "0 B/s"),
+            # Bytes per second
+            (512, "512.0 B/s"),
+            (1000, "1000.0 B/s"),
+            # KB/s
+            (1024, "1.0 KB/s"),
+            (1024 * 500, "500.0 KB/s"),
+            # MB/s
+            (1024 * 1024, "1.0 MB/s"),
+            (1024 * 1024 * 10, "10.0 MB/s"),
+            (1024 * 1024 * 100, "100.0 MB/s"),
+            # GB/s
+            (1024**3, "1.0 GB/s"),
+            # Non-finite values from progress math
+            (float("nan"), "nan TB/s"),
+            (float("inf"), "inf TB/s"),
+        ],
+    )
+    def test_format_speed(self, speed, expected):
+        """Test formatting speeds across all units."""
+        assert format_speed(speed) == expected
 
 
 class TestFormatTime:
     """Test suite for format_time function."""
 
-    def test_format_seconds(self):
-        """Test formatting seconds."""
-        assert format_time(0) == "0s"
-        assert format_time(30) == "30s"
-        assert format_time(59) == "59s"
-
-    def test_format_minutes(self):
-        """Test formatting minutes."""
-        assert format_time(60) == "1m 0s"
-        assert format_time(90) == "1m 30s"
-        assert format_time(3599) == "59m 59s"
-
-    def test_format_hours(self):
-        """Test formatting hours."""
-        assert format_time(3600) == "1h 0m"
-        assert format_time(3660) == "1h 1m"
-        assert format_time(7200) == "2h 0m"
-        assert format_time(86399) == "23h 59m"
-
-    def test_format_days(self):
-        """Test formatting days."""
-        assert format_time(86400) == "1d 0h"
-        assert format_time(86400 + 3600) == "1d 1h"
-        assert format_time(86400 * 7) == "7d 0h"
-
-    def test_format_negative(self):
-        """Test formatting negative time."""
-        assert format_time(-1) == "unknown"
-
-    def test_format_float(self):
-        """Test formatting float seconds."""
-        assert format_time(30.5) == "30s"
-        assert format_time(90.9) == "1m 30s"
+    @pytest.mark.parametrize(
+        "seconds, expected",
+        [
+            # Seconds
+            (0, "0s"),
+            (30, "30s"),
+            (59, "59s"),
+            # Minutes
+            (60, "1m 0s"),
+            (90, "1m 30s"),
+            (3599, "59m 59s"),
+            # Hours
+            (3600, "1h 0m"),
+            (3660, "1h 1m"),
+            (7200, "2h 0m"),
+            (86399, "23h 59m"),
+            # Days
+            (86400, "1d 0h"),
+            (86400 + 3600, "1d 1h"),
+            (86400 * 7, "7d 0h"),
+            # Negative
+            (-1, "unknown"),
+            # Float seconds are truncated
+            (30.5, "30s"),
+            (90.9, "1m 30s"),
+        ],
+    )
+    def test_format_time(self, seconds, expected):
+        """Test formatting durations across all units."""
+        assert format_time(seconds) == expected
 
 
 class TestParseMultipartFilename:
@@ -220,6 +223,22 @@ class TestGroupMultipartFiles:
             "model-00003-of-00003.gguf",
         ]
 
+    def test_group_files_sorted_by_part_number(self):
+        """Test that unpadded part numbers sort numerically, not lexically."""
+        files = [
+            "model-10-of-10.gguf",
+            "model-2-of-10.gguf",
+            "model-1-of-10.gguf",
+        ]
+
+        groups = group_multipart_files(files)
+
+        assert groups["model"] == [
+            "model-1-of-10.gguf",
+            "model-2-of-10.gguf",
+            "model-10-of-10.gguf",
+        ]
+
     def test_group_empty_list(self):
         """Test grouping empty list."""
         groups = group_multipart_files([])
@@ -271,7 +290,7 @@ class TestDownloadSpeedCalculator:
         calc = DownloadSpeedCalculator(window_size=5)
 
         assert calc.window_size == 5
-        assert len(calc.samples) == 0
+        assert calc.sample_count == 0
 
     def test_initialization_default_window(self):
         """Test default window size."""
@@ -287,18 +306,17 @@ class TestDownloadSpeedCalculator:
 
         assert speed == 0.0
 
-    def test_two_samples_calculates_speed(self):
+    def test_two_samples_calculates_speed(self, fake_clock):
         """Test speed calculation with two samples."""
         calc = DownloadSpeedCalculator()
 
         calc.update(0)
-        time.sleep(0.1)
         speed = calc.update(1024)
 
-        # Should be approximately 10240 B/s (1024 bytes / 0.1 seconds)
-        assert speed > 0
+        # 1024 bytes / 0.01 seconds
+        assert speed == 102400.0
 
-    def test_multiple_samples(self):
+    def test_multiple_samples(self, fake_clock):
         """Test speed with multiple samples."""
         calc = DownloadSpeedCalculator(window_size=5)
 
@@ -306,10 +324,51 @@ class TestDownloadSpeedCalculator:
         for i in range(10):
             speed = calc.update(i * 1024)
             speeds.append(speed)
-            time.sleep(0.01)
 
-        # Later samples should show consistent speed
+        # Later samples should show consistent speed (1 KB per 10 ms)
         assert speeds[-1] > 0
+        assert speeds[-1] == speeds[-2] == 102400.0
+
+    def test_speed_from_monotonic_ns(self, fake_clock):
+        """Test that speed is computed exactly from nanosecond timestamps."""
+        fake_clock.now_ns = 1_000_000_000
+        fake_clock.step_ns = 250_000_000
+        calc = DownloadSpeedCalculator()
+
+        calc.update(0)
+        speed = calc.update(1024)
+
+        assert speed == 4096.0  # 1024 bytes / 0.25 seconds
+
+    @pytest.mark.parametrize("window_size", [0, -1])
+    def test_invalid_window_size_rejected(self, window_size):
+        """Test that a window too small to hold a sample is rejected up front."""
+        with pytest.raises(ValueError, match="window_size must be at least 1"):
+            DownloadSpeedCalculator(window_size=window_size)
+
+    def test_zero_time_delta_returns_zero(self, fake_clock):
+        """Test that recent samples taken at the same instant report zero speed."""
+        calc = DownloadSpeedCalculator(window_size=4)
+
+        calc.update(0)
+        calc.update(1024)
+        fake_clock.step_ns = 0
+        calc.update(2048)
+        speed = calc.update(3072)
+
+        # No fallback to the full window, even though it spans real time and bytes
+        assert speed == 0.0
+
+    def test_stalled_recent_window_falls_back_to_full_window(self, fake_clock):
+        """Test that a stall in the recent samples uses the whole window instead."""
+        calc = DownloadSpeedCalculator(window_size=4)
+
+        calc.update(0)
+        calc.update(1024)
+        speed = calc.update(1024)  # No bytes over the last 10 ms
+
+        # 1024 bytes over the full 20 ms window
+        assert speed == 51200.0
 
     def test_window_size_limit(self):
         """Test that samples are limited to window size."""
@@ -318,7 +377,7 @@ class TestDownloadSpeedCalculator:
         for i in range(10):
             calc.update(i * 1024)
 
-        assert len(calc.samples) <= 3
+        assert calc.sample_count <= 3
 
     def test_reset(self):
         """Test calculator reset."""
@@ -326,19 +385,17 @@ class TestDownloadSpeedCalculator:
 
         calc.update(1024)
         calc.update(2048)
-        assert len(calc.samples) > 0
+        assert calc.sample_count > 0
 
         calc.reset()
-        assert len(calc.samples) == 0
+        assert calc.sample_count == 0
 
-    def test_zero_byte_delta(self):
+    def test_zero_byte_delta(self, fake_clock):
         """Test handling of zero byte delta (stalled download)."""
         calc = DownloadSpeedCalculator()
 
         calc.update(1024)
-        time.sleep(0.01)
         calc.update(1024)  # Same value - no progress
-        time.sleep(0.01)
         speed = calc.update(1024)
 
         # Speed should be 0 or use fallback
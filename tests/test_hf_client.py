@@ -1,17 +1,60 @@
 """Tests for HuggingFace client."""
 
-import time
+import inspect
 import pytest
-from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import Mock, create_autospec
 
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from huggingface_hub import HfApi
 
 from src.services.hf_client import HuggingFaceClient
 from src.exceptions import HuggingFaceError, NetworkError
 
+# huggingface_hub 1.0 removed list_models(direction=...), which search_models still
+# passes; the autospecced HfApi rejects that call on those hub releases
+_xfail_list_models_direction = pytest.mark.xfail(
+    "direction" not in inspect.signature(HfApi.list_models).parameters,
+    reason="search_models passes direction=-1, which huggingface_hub>=1.0 removed",
+    raises=HuggingFaceError,
+    strict=True,
+)
+
+# Read-only repo siblings shared by tests that don't mutate them
+_SIBLINGS_OK = (
+    SimpleNamespace(rfilename="model.gguf", size=1024 * 1024 * 100),  # 100 MB
+    SimpleNamespace(rfilename="README.md", size=1024),
+)
+
+
+@pytest.fixture(scope="module")
+def shared_client():
+    """Create one client with a mocked API, shared by every test in this module."""
+    client = HuggingFaceClient()
+    client.api = create_autospec(HfApi, instance=True, spec_set=True)
+    return client
+
+
+@pytest.fixture
+def mock_client(shared_client):
+    """Hand out the shared client with an empty cache and a reset API mock."""
+    shared_client._cache.clear()
+    shared_client.api.reset_mock(return_value=True, side_effect=True)
+    return shared_client
+
+
+@pytest.fixture
+def model_stub():
+    """Create plain model info data with minimal defaults; tests override only what they check."""
+    return SimpleNamespace(
+        id="author/model",
+        author="author",
+        downloads=0,
+        likes=0,
+        lastModified=None,
+        cardData=None,
+        tags=[],
+    )
+
 
 class TestHuggingFaceClientInitialization:
     """Test suite for HuggingFaceClient initialization."""
@@ -48,14 +91,17 @@ class TestHuggingFaceClientCaching:
         assert hit is False
         assert value is None
 
-    def test_cache_expiry(self):
+    def test_cache_expiry(self, monkeypatch):
         """Test cache expires after duration."""
-        client = HuggingFaceClient(cache_duration=0)  # Expire immediately
-        client._set_cache("test_key", "value")
+        # Stored at t=1000, read at t=2000: well past the 60 second TTL. A fixed
+        # return_value is safe however many times anything else reads the clock.
+        clock = Mock(return_value=1000.0)
+        monkeypatch.setattr("src.services.hf_client.time.time", clock)
 
-        # Wait a tiny bit to ensure expiry
-        time.sleep(0.01)
+        client = HuggingFaceClient(cache_duration=60)
+        client._set_cache("test_key", "value")
 
+        clock.return_value = 2000.0
         hit, value = client._get_cached("test_key")
         assert hit is False
         assert value is None
@@ -84,25 +130,17 @@ class TestHuggingFaceClientCaching:
 class TestSearchModels:
     """Test suite for search_models method."""
 
-    @pytest.fixture
-    def mock_client(self):
-        """Create a client with mocked API."""
-        client = HuggingFaceClient()
-        client.api = Mock()
-        return client
-
-    def test_search_models_success(self, mock_client):
+    @_xfail_list_models_direction
+    def test_search_models_success(self, mock_client, model_stub):
         """Test successful model search."""
-        mock_model = Mock()
-        mock_model.id = "author/model-name"
-        mock_model.author = "author"
-        mock_model.downloads = 1000
-        mock_model.likes = 50
-        mock_model.lastModified = "2024-01-01"
-        mock_model.cardData = {"description": "Test model"}
-        mock_model.tags = ["gguf", "llama"]
+        model_stub.id = "author/model-name"
+        model_stub.downloads = 1000
+        model_stub.likes = 50
+        model_stub.lastModified = "2024-01-01"
+        model_stub.cardData = {"description": "Test model"}
+        model_stub.tags = ["gguf", "llama"]
 
-        mock_client.api.list_models.return_value = [mock_model]
+        mock_client.api.list_models.return_value = [model_stub]
 
         results = mock_client.search_models("llama", limit=10)
 
@@ -110,32 +148,31 @@ class TestSearchModels:
         assert results[0]["repo_id"] == "author/model-name"
         assert results[0]["author"] == "author"
         assert results[0]["downloads"] == 1000
-        mock_client.api.list_models.assert_called_once_with(
-            search="llama", filter="gguf", limit=10, sort="downloads", direction=-1
-        )
-
-    def test_search_models_caching(self, mock_client):
+        assert mock_client.api.list_models.call_count == 1
+        assert mock_client.api.list_models.call_args.kwargs == {
+            "search": "llama",
+            "filter": "gguf",
+            "limit": 10,
+            "sort": "downloads",
+            "direction": -1,
+        }
+
+    @_xfail_list_models_direction
+    def test_search_models_caching(self, mock_client, model_stub):
         """Test search results are cached."""
-        mock_model = Mock()
-        mock_model.id = "author/model"
-        mock_model.author = "author"
-        mock_model.downloads = 100
-        mock_model.likes = 10
-        mock_model.lastModified = None
-        mock_model.cardData = None
-        mock_model.tags = []
-
-        mock_client.api.list_models.return_value = [mock_model]
+        mock_client.api.list_models.return_value = [model_stub]
 
         # First call
         results1 = mock_client.search_models("test", limit=50)
         # Second call - should use cache
         results2 = mock_client.search_models("test", limit=50)
 
-        assert results1 == results2
+        # Cache hits hand back the stored list itself, not a rebuilt copy
+        assert results2 is results1
         # API should only be called once due to caching
         assert mock_client.api.list_models.call_count == 1
 
+    @_xfail_list_models_direction
     def test_search_models_empty_results(self, mock_client):
         """Test empty search results."""
         mock_client.api.list_models.return_value = []
@@ -144,43 +181,18 @@ class TestSearchModels:
 
         assert results == []
 
-    def test_search_models_network_error(self, mock_client):
-        """Test network error during search."""
-        mock_client.api.list_models.side_effect = OSError("Connection refused")
-
-        with pytest.raises(NetworkError):
-            mock_client.search_models("test")
-
-    def test_search_models_api_error(self, mock_client):
-        """Test API error during search."""
-        mock_client.api.list_models.side_effect = Exception("API error")
-
-        with pytest.raises(HuggingFaceError):
-            mock_client.search_models("test")
-
 
 class TestGetModelInfo:
     """Test suite for get_model_info method."""
 
-    @pytest.fixture
-    def mock_client(self):
-        """Create a client with mocked API."""
-        client = HuggingFaceClient()
-        client.api = Mock()
-        return client
-
-    def test_get_model_info_success(self, mock_client):
+    def test_get_model_info_success(self, mock_client, model_stub):
         """Test successful model info retrieval."""
-        mock_model = Mock()
-        mock_model.id = "author/model"
-        mock_model.author = "author"
-        mock_model.downloads = 500
-        mock_model.likes = 25
-        mock_model.lastModified = "2024-01-01"
-        mock_model.cardData = None
-        mock_model.tags = ["gguf"]
+        model_stub.downloads = 500
+        model_stub.likes = 25
+        model_stub.lastModified = "2024-01-01"
+        model_stub.tags = ["gguf"]
 
-        mock_client.api.model_info.return_value = mock_model
+        mock_client.api.model_info.return_value = model_stub
 
         result = mock_client.get_model_info("author/model")
 
@@ -188,18 +200,9 @@ class TestGetModelInfo:
         assert result["repo_id"] == "author/model"
         assert result["downloads"] == 500
 
-    def test_get_model_info_caching(self, mock_client):
+    def test_get_model_info_caching(self, mock_client, model_stub):
         """Test model info is cached."""
-        mock_model = Mock()
-        mock_model.id = "author/model"
-        mock_model.author = "author"
-        mock_model.downloads = 100
-        mock_model.likes = 10
-        mock_model.lastModified = None
-        mock_model.cardData = None
-        mock_model.tags = []
-
-        mock_client.api.model_info.return_value = mock_model
+        mock_client.api.model_info.return_value = model_stub
 
         # First call
         mock_client.get_model_info("author/model")
@@ -208,67 +211,44 @@ class TestGetModelInfo:
 
         assert mock_client.api.model_info.call_count == 1
 
-    def test_get_model_info_network_error(self, mock_client):
-        """Test network error during model info fetch."""
-        mock_client.api.model_info.side_effect = OSError("Timeout")
-
-        with pytest.raises(NetworkError):
-            mock_client.get_model_info("author/model")
-
-    def test_get_model_info_api_error(self, mock_client):
-        """Test API error during model info fetch."""
-        mock_client.api.model_info.side_effect = Exception("Not found")
-
-        with pytest.raises(HuggingFaceError):
-            mock_client.get_model_info("author/model")
-
 
 class TestListGgufFiles:
     """Test suite for list_gguf_files method."""
 
-    @pytest.fixture
-    def mock_client(self):
-        """Create a client with mocked API."""
-        client = HuggingFaceClient()
-        client.api = Mock()
-        return client
-
-    def test_list_gguf_files_success(self, mock_client):
-        """Test successful GGUF file listing."""
-        mock_client.api.list_repo_files.return_value = [
-            "model.gguf",
-            "model-Q4_K_M.gguf",
-            "README.md",
-            "config.json",
-            "tokenizer.json",
-        ]
-
-        files = mock_client.list_gguf_files("author/model")
-
-        assert len(files) == 2
-        assert "model.gguf" in files
-        assert "model-Q4_K_M.gguf" in files
-        assert "README.md" not in files
-
-    def test_list_gguf_files_case_insensitive(self, mock_client):
-        """Test GGUF extension matching is case-insensitive."""
-        mock_client.api.list_repo_files.return_value = [
-            "model.GGUF",
-            "model2.Gguf",
-            "model3.gguf",
-        ]
+    @pytest.mark.parametrize(
+        "repo_files, expected",
+        [
+            pytest.param(
+                ["model.gguf", "model-Q4_K_M.gguf", "README.md", "config.json", "tokenizer.json"],
+                ["model.gguf", "model-Q4_K_M.gguf"],
+                id="mixed",
+            ),
+            pytest.param(
+                ["model.GGUF", "model2.Gguf", "model3.gguf"],
+                ["model.GGUF", "model2.Gguf", "model3.gguf"],
+                id="case_insensitive",
+            ),
+            pytest.param(["README.md", "config.json"], [], id="empty"),
+        ],
+    )
+    def test_list_gguf_files(self, mock_client, repo_files, expected):
+        """Test only GGUF files are listed, matching the extension case-insensitively."""
+        mock_client.api.list_repo_files.return_value = repo_files
 
         files = mock_client.list_gguf_files("author/model")
 
-        assert len(files) == 3
+        assert files == expected
 
-    def test_list_gguf_files_empty(self, mock_client):
-        """Test empty file list."""
-        mock_client.api.list_repo_files.return_value = ["README.md", "config.json"]
+    def test_list_gguf_files_large_repo(self, mock_client):
+        """Test filtering a repository with thousands of files."""
+        repo_files = [f"shard-{i:05d}.{'GGUF' if i % 3 else 'bin'}" for i in range(10_000)]
+        repo_files += ["model.gguf.json", "notes-gguf.txt"]
+        mock_client.api.list_repo_files.return_value = repo_files
 
         files = mock_client.list_gguf_files("author/model")
 
-        assert files == []
+        assert len(files) == 6666
+        assert all(f.endswith(".GGUF") for f in files)
 
     def test_list_gguf_files_caching(self, mock_client):
         """Test file listing is cached."""
@@ -279,36 +259,13 @@ class TestListGgufFiles:
 
         assert mock_client.api.list_repo_files.call_count == 1
 
-    def test_list_gguf_files_network_error(self, mock_client):
-        """Test network error during file listing."""
-        mock_client.api.list_repo_files.side_effect = OSError("Connection reset")
-
-        with pytest.raises(NetworkError):
-            mock_client.list_gguf_files("author/model")
-
 
 class TestGetFileSizes:
     """Test suite for get_file_sizes method."""
 
-    @pytest.fixture
-    def mock_client(self):
-        """Create a client with mocked API."""
-        client = HuggingFaceClient()
-        client.api = Mock()
-        return client
-
     def test_get_file_sizes_success(self, mock_client):
         """Test successful file size retrieval."""
-        mock_sibling1 = Mock()
-        mock_sibling1.rfilename = "model.gguf"
-        mock_sibling1.size = 1024 * 1024 * 100  # 100 MB
-
-        mock_sibling2 = Mock()
-        mock_sibling2.rfilename = "README.md"
-        mock_sibling2.size = 1024
-
-        mock_model_info = Mock()
-        mock_model_info.siblings = [mock_sibling1, mock_sibling2]
+        mock_model_info = SimpleNamespace(siblings=_SIBLINGS_OK)
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -319,11 +276,8 @@ class TestGetFileSizes:
 
     def test_get_file_sizes_missing_size(self, mock_client):
         """Test handling of missing size attribute."""
-        mock_sibling = Mock(spec=["rfilename"])  # No size attribute
-        mock_sibling.rfilename = "model.gguf"
-
-        mock_model_info = Mock()
-        mock_model_info.siblings = [mock_sibling]
+        mock_sibling = SimpleNamespace(rfilename="model.gguf")  # No size attribute
+        mock_model_info = SimpleNamespace(siblings=[mock_sibling])
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -333,12 +287,8 @@ class TestGetFileSizes:
 
     def test_get_file_sizes_none_size(self, mock_client):
         """Test handling of None size."""
-        mock_sibling = Mock()
-        mock_sibling.rfilename = "model.gguf"
-        mock_sibling.size = None
-
-        mock_model_info = Mock()
-        mock_model_info.siblings = [mock_sibling]
+        mock_sibling = SimpleNamespace(rfilename="model.gguf", size=None)
+        mock_model_info = SimpleNamespace(siblings=[mock_sibling])
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -348,12 +298,7 @@ class TestGetFileSizes:
 
     def test_get_file_sizes_caching(self, mock_client):
         """Test file sizes are cached."""
-        mock_sibling = Mock()
-        mock_sibling.rfilename = "model.gguf"
-        mock_sibling.size = 1024
-
-        mock_model_info = Mock()
-        mock_model_info.siblings = [mock_sibling]
+        mock_model_info = SimpleNamespace(siblings=_SIBLINGS_OK)
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -362,28 +307,13 @@ class TestGetFileSizes:
 
         assert mock_client.api.model_info.call_count == 1
 
-    def test_get_file_sizes_network_error(self, mock_client):
-        """Test network error during file size fetch."""
-        mock_client.api.model_info.side_effect = OSError("DNS error")
-
-        with pytest.raises(NetworkError):
-            mock_client.get_file_sizes("author/model")
-
 
 class TestGetCommitSha:
     """Test suite for get_commit_sha method."""
 
-    @pytest.fixture
-    def mock_client(self):
-        """Create a client with mocked API."""
-        client = HuggingFaceClient()
-        client.api = Mock()
-        return client
-
     def test_get_commit_sha_success(self, mock_client):
         """Test successful commit SHA retrieval."""
-        mock_model_info = Mock()
-        mock_model_info.sha = "abc123def456"
+        mock_model_info = SimpleNamespace(sha="abc123def456")
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -393,7 +323,7 @@ class TestGetCommitSha:
 
     def test_get_commit_sha_no_sha(self, mock_client):
         """Test handling of missing SHA attribute."""
-        mock_model_info = Mock(spec=[])  # No sha attribute
+        mock_model_info = SimpleNamespace()  # No sha attribute
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -403,8 +333,7 @@ class TestGetCommitSha:
 
     def test_get_commit_sha_not_cached(self, mock_client):
         """Test commit SHA is NOT cached (intentional for update checks)."""
-        mock_model_info = Mock()
-        mock_model_info.sha = "abc123"
+        mock_model_info = SimpleNamespace(sha="abc123")
 
         mock_client.api.model_info.return_value = mock_model_info
 
@@ -414,31 +343,51 @@ class TestGetCommitSha:
         # Should be called twice since we don't cache commit SHAs
         assert mock_client.api.model_info.call_count == 2
 
-    def test_get_commit_sha_network_error(self, mock_client):
-        """Test network error during SHA fetch."""
-        mock_client.api.model_info.side_effect = OSError("Network unreachable")
 
-        with pytest.raises(NetworkError):
-            mock_client.get_commit_sha("author/model")
+class TestApiErrors:
+    """Test suite for mapping API failures onto the client's exception types."""
+
+    @pytest.mark.parametrize(
+        "method, api_method, error, expected",
+        [
+            pytest.param(
+                "search_models",
+                "list_models",
+                OSError("Connection refused"),
+                NetworkError,
+                marks=_xfail_list_models_direction,
+            ),
+            ("search_models", "list_models", Exception("API error"), HuggingFaceError),
+            ("get_model_info", "model_info", OSError("Timeout"), NetworkError),
+            ("get_model_info", "model_info", Exception("Not found"), HuggingFaceError),
+            ("list_gguf_files", "list_repo_files", OSError("Connection reset"), NetworkError),
+            ("get_file_sizes", "model_info", OSError("DNS error"), NetworkError),
+            ("get_commit_sha", "model_info", OSError("Network unreachable"), NetworkError),
+        ],
+    )
+    def test_api_error_raised(self, mock_client, method, api_method, error, expected):
+        """Test network and API errors surface as NetworkError / HuggingFaceError."""
+        getattr(mock_client.api, api_method).side_effect = error
+
+        with pytest.raises(expected):
+            getattr(mock_client, method)("author/model")
 
 
 class TestExtractModelData:
     """Test suite for _extract_model_data method."""
 
-    def test_extract_model_data_full(self):
+    def test_extract_model_data_full(self, model_stub):
         """Test extraction with all fields present."""
         client = HuggingFaceClient()
 
-        mock_model = Mock()
-        mock_model.id = "author/model-name"
-        mock_model.author = "author"
-        mock_model.downloads = 1000
-        mock_model.likes = 50
-        mock_model.lastModified = "2024-01-01T00:00:00Z"
-        mock_model.cardData = {"description": "A test model"}
-        mock_model.tags = ["gguf", "llama", "7b"]
+        model_stub.id = "author/model-name"
+        model_stub.downloads = 1000
+        model_stub.likes = 50
+        model_stub.lastModified = "2024-01-01T00:00:00Z"
+        model_stub.cardData = {"description": "A test model"}
+        model_stub.tags = ["gguf", "llama", "7b"]
 
-        result = client._extract_model_data(mock_model)
+        result = client._extract_model_data(model_stub)
 
         assert result is not None
         assert result["repo_id"] == "author/model-name"
@@ -449,20 +398,16 @@ class TestExtractModelData:
         assert result["description"] == "A test model"
         assert "gguf" in result["tags"]
 
-    def test_extract_model_data_minimal(self):
+    def test_extract_model_data_minimal(self, model_stub):
         """Test extraction with minimal fields."""
         client = HuggingFaceClient()
 
-        mock_model = Mock()
-        mock_model.id = "author/model"
-        mock_model.author = None
-        mock_model.downloads = None
-        mock_model.likes = None
-        mock_model.lastModified = None
-        mock_model.cardData = None
-        mock_model.tags = None
+        model_stub.author = None
+        model_stub.downloads = None
+        model_stub.likes = None
+        model_stub.tags = None
 
-        result = client._extract_model_data(mock_model)
+        result = client._extract_model_data(model_stub)
 
         assert result is not None
         assert result["repo_id"] == "author/model"
@@ -472,20 +417,13 @@ class TestExtractModelData:
         assert result["description"] == ""
         assert result["tags"] == []
 
-    def test_extract_model_data_invalid_card_data(self):
+    def test_extract_model_data_invalid_card_data(self, model_stub):
         """Test extraction with invalid cardData type."""
         client = HuggingFaceClient()
 
-        mock_model = Mock()
-        mock_model.id = "author/model"
-        mock_model.author = "author"
-        mock_model.downloads = 0
-        mock_model.likes = 0
-        mock_model.lastModified = None
-        mock_model.cardData = "not a dict"  # Invalid type
-        mock_model.tags = []
+        model_stub.cardData = "not a dict"  # Invalid type
 
-        result = client._extract_model_data(mock_model)
+        result = client._extract_model_data(model_stub)
 
         assert result is not None
         assert result["description"] == ""
@@ -1,110 +1,133 @@
 """Integration tests for Model Manager end-to-end workflows."""
 
 import asyncio
+import os
+import threading
+import time
 import pytest
+from collections import defaultdict
 from pathlib import Path
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
-import tempfile
-import shutil
-import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch, create_autospec
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from huggingface_hub import HfApi
 
 from src.services.downloader import DownloadManager
 from src.services.hf_client import HuggingFaceClient
 from src.services.storage import StorageManager
-from src.exceptions import DownloadError, NetworkError, HuggingFaceError
-
-
-class TestEndToEndDownload:
-    """Integration tests for complete download workflow."""
-
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for tests."""
-        tmpdir = tempfile.mkdtemp()
-        yield Path(tmpdir)
-        shutil.rmtree(tmpdir)
+from src.exceptions import DownloadError, NetworkError
+
+pytestmark = pytest.mark.integration
+
+# asyncio_mode = "auto" collects the async tests; the download classes share one module-wide loop
+_module_loop = pytest.mark.asyncio(loop_scope="module")
+
+# Contents written by the mocked downloads
+_DUMMY_PAYLOAD = b"x" * 100
+
+
+def _fake_download(repo_id, filename, local_dir, revision=None):
+    """Stand in for hf_hub_download by writing the dummy payload to the target file."""
+    file_path = Path(local_dir) / filename
+    file_path.write_bytes(_DUMMY_PAYLOAD)
+    return str(file_path)
+
+
+# Canned Hub responses; read-only, shared by every StubHFClient
+_SEARCH_RESULTS = [
+    {
+        "modelId": "test/model-1",
+        "author": "testuser",
+        "downloads": 1000000,
+        "lastModified": "2024-01-01T00:00:00.000Z",
+    },
+    {
+        "modelId": "test/model-2",
+        "author": "testuser",
+        "downloads": 500000,
+        "lastModified": "2024-01-02T00:00:00.000Z",
+    },
+]
+_MODEL_INFO = {
+    "modelId": "test/model-1",
+    "author": "testuser",
+    "description": "Test model description",
+    "downloads": 1000000,
+    "lastModified": "2024-01-01T00:00:00.000Z",
+    "tags": ["gguf", "llama"],
+}
+_GGUF_FILES = [
+    {
+        "filename": "model-q4_k_m.gguf",
+        "size": 4 * 1024 * 1024 * 1024,  # 4 GB
+        "quantization": "Q4_K_M",
+    },
+    {
+        "filename": "model-q5_k_m.gguf",
+        "size": 5 * 1024 * 1024 * 1024,  # 5 GB
+        "quantization": "Q5_K_M",
+    },
+]
+_FILE_SIZES = {
+    "model-q4_k_m.gguf": 4 * 1024 * 1024 * 1024,
+    "model-q5_k_m.gguf": 5 * 1024 * 1024 * 1024,
+}
+
+
+class StubHFClient:
+    """Stand-in for HuggingFaceClient returning canned responses and logging calls."""
+
+    def __init__(self):
+        self.calls = defaultdict(list)
+
+    def search_models(self, query, limit=50):
+        self.calls["search_models"].append(((query,), {"limit": limit}))
+        return _SEARCH_RESULTS
+
+    def get_model_info(self, repo_id):
+        self.calls["get_model_info"].append(((repo_id,), {}))
+        return _MODEL_INFO
+
+    def list_gguf_files(self, repo_id):
+        self.calls["list_gguf_files"].append(((repo_id,), {}))
+        return _GGUF_FILES
+
+    def get_file_sizes(self, repo_id):
+        self.calls["get_file_sizes"].append(((repo_id,), {}))
+        return _FILE_SIZES
+
+    def get_commit_sha(self, repo_id):
+        self.calls["get_commit_sha"].append(((repo_id,), {}))
+        return "abc123def456"
+
+    def assert_called_once_with(self, method, *args, **kwargs):
+        """Assert that ``method`` was called exactly once, with these arguments."""
+        assert self.calls[method] == [(args, kwargs)]
+
+
+@_module_loop
+class TestEndToEndDownloadReadOnly:
+    """Integration tests for workflow steps that leave storage untouched."""
 
     @pytest.fixture
     def mock_hf_client(self):
-        """Create a mock HuggingFace client with realistic responses."""
-        client = Mock(spec=HuggingFaceClient)
-
-        # Mock search results
-        client.search_models = Mock(
-            return_value=[
-                {
-                    "modelId": "test/model-1",
-                    "author": "testuser",
-                    "downloads": 1000000,
-                    "lastModified": "2024-01-01T00:00:00.000Z",
-                },
-                {
-                    "modelId": "test/model-2",
-                    "author": "testuser",
-                    "downloads": 500000,
-                    "lastModified": "2024-01-02T00:00:00.000Z",
-                },
-            ]
-        )
-
-        # Mock model info
-        client.get_model_info = Mock(
-            return_value={
-                "modelId": "test/model-1",
-                "author": "testuser",
-                "description": "Test model description",
-                "downloads": 1000000,
-                "lastModified": "2024-01-01T00:00:00.000Z",
-                "tags": ["gguf", "llama"],
-            }
-        )
-
-        # Mock GGUF file listing
-        client.list_gguf_files = Mock(
-            return_value=[
-                {
-                    "filename": "model-q4_k_m.gguf",
-                    "size": 4 * 1024 * 1024 * 1024,  # 4 GB
-                    "quantization": "Q4_K_M",
-                },
-                {
-                    "filename": "model-q5_k_m.gguf",
-                    "size": 5 * 1024 * 1024 * 1024,  # 5 GB
-                    "quantization": "Q5_K_M",
-                },
-            ]
+        """Create a stub HuggingFace client with realistic responses."""
+        return StubHFClient()
+
+    @pytest.fixture(scope="class")
+    def storage_manager(self, tmp_path_factory):
+        """Create a storage manager shared by the class; no test here writes to it."""
+        tmp_path = tmp_path_factory.mktemp("readonly")
+        return StorageManager(
+            models_dir=tmp_path / "models",
+            metadata_file=tmp_path / "metadata.json",
         )
 
-        # Mock file sizes
-        client.get_file_sizes = Mock(
-            return_value={
-                "model-q4_k_m.gguf": 4 * 1024 * 1024 * 1024,
-                "model-q5_k_m.gguf": 5 * 1024 * 1024 * 1024,
-            }
-        )
-
-        # Mock commit SHA
-        client.get_commit_sha = Mock(return_value="abc123def456")
-
-        return client
-
-    @pytest.fixture
-    def storage_manager(self, temp_dir):
-        """Create a storage manager instance."""
-        storage = StorageManager(
-            models_dir=temp_dir / "models",
-            metadata_file=temp_dir / "metadata.json",
-        )
-        return storage
-
     @pytest.fixture
     def downloader(self, mock_hf_client, storage_manager):
-        """Create a download manager instance."""
+        """Create a download manager instance; it caches free disk space, so never shared."""
         return DownloadManager(mock_hf_client, storage_manager)
 
-    @pytest.mark.asyncio
     async def test_search_to_download_workflow(self, mock_hf_client, downloader, storage_manager):
         """Test complete workflow from search to download."""
         repo_id = "test/model-1"
@@ -114,24 +137,24 @@ class TestEndToEndDownload:
         search_results = mock_hf_client.search_models("test", limit=10)
         assert len(search_results) == 2
         assert search_results[0]["modelId"] == repo_id
-        mock_hf_client.search_models.assert_called_once_with("test", limit=10)
+        mock_hf_client.assert_called_once_with("search_models", "test", limit=10)
 
         # Step 2: Get model details
         model_info = mock_hf_client.get_model_info(repo_id)
         assert model_info["modelId"] == repo_id
-        mock_hf_client.get_model_info.assert_called_once_with(repo_id)
+        mock_hf_client.assert_called_once_with("get_model_info", repo_id)
 
         # Step 3: List GGUF files
         gguf_files = mock_hf_client.list_gguf_files(repo_id)
         assert len(gguf_files) == 2
         assert gguf_files[0]["filename"] == files[0]
-        mock_hf_client.list_gguf_files.assert_called_once_with(repo_id)
+        mock_hf_client.assert_called_once_with("list_gguf_files", repo_id)
 
         # Step 4: Get file sizes
         file_sizes = mock_hf_client.get_file_sizes(repo_id)
         assert files[0] in file_sizes
         assert file_sizes[files[0]] == 4 * 1024 * 1024 * 1024
-        mock_hf_client.get_file_sizes.assert_called_once_with(repo_id)
+        mock_hf_client.assert_called_once_with("get_file_sizes", repo_id)
 
         # Step 5: Validate download
         valid, msg = await downloader.validate_download(repo_id, files, sum(file_sizes.values()))
@@ -143,8 +166,58 @@ class TestEndToEndDownload:
         assert repo_id in str(model_path)
         assert storage_manager.models_dir in model_path.parents
 
-    @pytest.mark.asyncio
-    async def test_multi_file_download_workflow(self, mock_hf_client, downloader):
+    async def test_download_with_insufficient_space(self, downloader):
+        """Test download fails gracefully when insufficient disk space."""
+        repo_id = "test/model-1"
+        files = ["model-q4_k_m.gguf"]
+
+        # Mock disk_usage to return very small space
+        with patch("shutil.disk_usage") as mock_disk:
+            mock_disk.return_value = Mock(free=1024)  # Only 1KB free
+
+            valid, msg = await downloader.validate_download(
+                repo_id, files, 4 * 1024 * 1024 * 1024  # 4GB file
+            )
+
+            assert valid is False
+            assert "Insufficient disk space" in msg
+
+
+@_module_loop
+class TestEndToEndDownloadStateful:
+    """Integration tests for complete download workflows that write to storage."""
+
+    @pytest.fixture
+    def mock_hf_client(self):
+        """Create a stub HuggingFace client with realistic responses."""
+        return StubHFClient()
+
+    @pytest.fixture(scope="class")
+    def hf_download(self):
+        """Patch hf_hub_download once for the class; each test sets its side_effect."""
+        with patch("src.services.downloader.hf_hub_download") as mock_download:
+            yield mock_download
+
+    @pytest.fixture(autouse=True)
+    def reset_hf_download(self, hf_download):
+        """Clear the previous test's calls and side_effect from the shared patch."""
+        hf_download.reset_mock(side_effect=True)
+
+    @pytest.fixture
+    def storage_manager(self, tmp_path):
+        """Create a storage manager instance."""
+        storage = StorageManager(
+            models_dir=tmp_path / "models",
+            metadata_file=tmp_path / "metadata.json",
+        )
+        return storage
+
+    @pytest.fixture
+    def downloader(self, mock_hf_client, storage_manager):
+        """Create a download manager instance."""
+        return DownloadManager(mock_hf_client, storage_manager)
+
+    async def test_multi_file_download_workflow(self, mock_hf_client, downloader, hf_download):
         """Test downloading multiple files in sequence."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf", "model-q5_k_m.gguf"]
@@ -152,33 +225,32 @@ class TestEndToEndDownload:
         # Mock hf_hub_download to create dummy files
         downloaded_files = []
 
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)  # Create small test file
+        def mock_download(repo_id, filename, local_dir, revision=None):
             downloaded_files.append(filename)
-            return str(file_path)
+            return _fake_download(repo_id, filename, local_dir)
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            # Track progress updates
-            progress_updates = []
+        hf_download.side_effect = mock_download
 
-            def callback(data):
-                progress_updates.append(data)
+        # Track progress updates
+        progress_updates = []
 
-            # Download both files
-            success = await downloader.download_model(repo_id, files, callback)
+        def callback(data):
+            progress_updates.append(data)
 
-            assert success is True
-            assert len(downloaded_files) == 2
-            assert "model-q4_k_m.gguf" in downloaded_files
-            assert "model-q5_k_m.gguf" in downloaded_files
+        # Download both files
+        success = await downloader.download_model(repo_id, files, callback)
 
-            # Verify progress was sent
-            assert len(progress_updates) > 0
-            assert progress_updates[0]["repo_id"] == repo_id
+        assert success is True
+        assert len(downloaded_files) == 2
+        assert "model-q4_k_m.gguf" in downloaded_files
+        assert "model-q5_k_m.gguf" in downloaded_files
 
-    @pytest.mark.asyncio
-    async def test_download_with_retry(self, downloader, temp_dir):
+        # Verify progress was sent
+        assert len(progress_updates) > 0
+        assert progress_updates[0]["repo_id"] == repo_id
+
+    @pytest.mark.slow
+    async def test_download_with_retry(self, downloader, tmp_path, hf_download):
         """Test download retry on network errors."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
@@ -186,143 +258,122 @@ class TestEndToEndDownload:
         # Mock hf_hub_download to fail twice then succeed
         attempt_count = [0]
 
-        def mock_download_with_retry(repo_id, filename, local_dir):
+        def mock_download_with_retry(repo_id, filename, local_dir, revision=None):
             attempt_count[0] += 1
             if attempt_count[0] < 3:
                 # Simulate network error
                 raise ConnectionError("Network error")
             # Succeed on third attempt
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+            return _fake_download(repo_id, filename, local_dir)
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download_with_retry):
-            success = await downloader.download_model(repo_id, files)
-            assert success is True
-            assert attempt_count[0] == 3  # 2 failures + 1 success
+        hf_download.side_effect = mock_download_with_retry
+        success = await downloader.download_model(repo_id, files)
+        assert success is True
+        assert attempt_count[0] == 3  # 2 failures + 1 success
 
-    @pytest.mark.asyncio
-    async def test_download_cancellation(self, downloader, temp_dir):
+    async def test_download_cancellation(self, downloader, tmp_path, hf_download):
         """Test download cancellation during active download."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
         # Mock hf_hub_download to be cancellable
-        import threading
-
-        download_started = threading.Event()
-        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        download_started = asyncio.Event()
 
-        def cancellable_download(repo_id, filename, local_dir):
-            download_started.set()
+        def cancellable_download(repo_id, filename, local_dir, revision=None):
+            # Runs in the executor thread, so hand the signal to the event loop
+            loop.call_soon_threadsafe(download_started.set)
             # Sleep in short increments, checking for cancellation
-            import time
-
-            for _ in range(10):
-                if cancel_event.is_set():
+            for _ in range(200):
+                if downloader._cancelled:
                     raise Exception("Download cancelled")
-                time.sleep(0.1)
+                time.sleep(0.01)
             # If we get here, download completed normally
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+            return _fake_download(repo_id, filename, local_dir)
 
-        # Patch hf_hub_download and also patch the cancellation check
-        with patch("src.services.downloader.hf_hub_download", side_effect=cancellable_download):
-            # Start download in background
-            download_task = asyncio.create_task(downloader.download_model(repo_id, files))
+        # Route the shared hf_hub_download patch to the cancellable mock
+        hf_download.side_effect = cancellable_download
 
-            # Wait for download to start
-            download_started.wait()
+        # Start download in background
+        download_task = asyncio.create_task(downloader.download_model(repo_id, files))
 
-            # Set cancellation flag and event
-            downloader.cancel_download()
-            cancel_event.set()
+        # Wait for download to start without blocking the event loop
+        await download_started.wait()
 
-            # Wait for download task to complete
-            success = await download_task
+        # Set cancellation flag
+        downloader.cancel_download()
 
-            # Download should be cancelled
-            assert success is False
+        # Wait for download task to complete
+        success = await download_task
 
-    @pytest.mark.asyncio
-    async def test_download_with_existing_files(self, downloader, temp_dir):
+        # Download should be cancelled
+        assert success is False
+
+    async def test_download_with_existing_files(self, downloader, storage_manager, hf_download):
         """Test download when some files already exist."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf", "model-q5_k_m.gguf"]
 
-        # Pre-create one file - note that downloader checks file size so we need
-        # the file to match expected size or be skipped. Since mock_download creates
-        # small files, we'll let both files be downloaded for this test
-        model_path = Path(temp_dir) / "models" / repo_id.replace("/", "__")
+        # Pre-create one complete file where the downloader will look for it; a sparse
+        # file at the expected size makes it skip the download without writing 4 GB
+        model_path = storage_manager.get_model_path(repo_id)
         model_path.mkdir(parents=True, exist_ok=True)
-        (model_path / "model-q4_k_m.gguf").write_bytes(b"x" * 100)
+        existing_file = model_path / "model-q4_k_m.gguf"
+        existing_file.touch()
+        os.truncate(existing_file, _FILE_SIZES["model-q4_k_m.gguf"])
 
         # Track which files were actually downloaded
         downloaded_files = []
 
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
+        def mock_download(repo_id, filename, local_dir, revision=None):
             downloaded_files.append(filename)
-            return str(file_path)
+            return _fake_download(repo_id, filename, local_dir)
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            success = await downloader.download_model(repo_id, files)
+        hf_download.side_effect = mock_download
+        success = await downloader.download_model(repo_id, files)
 
-            assert success is True
-            # Since pre-created file doesn't match expected size, both are downloaded
-            assert len(downloaded_files) == 2
+        assert success is True
+        # The complete file is skipped; only the missing one is fetched
+        assert downloaded_files == ["model-q5_k_m.gguf"]
 
-    @pytest.mark.asyncio
-    async def test_storage_scan_after_download(self, downloader, storage_manager):
+    async def test_storage_scan_after_download(self, downloader, storage_manager, hf_download):
         """Test that storage manager correctly detects downloaded models."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
-        # Mock hf_hub_download to create file
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+        hf_download.side_effect = _fake_download
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            # Download model
-            success = await downloader.download_model(repo_id, files)
-            assert success is True
+        # Download model
+        success = await downloader.download_model(repo_id, files)
+        assert success is True
 
-            # Scan for local models
-            models = storage_manager.scan_local_models()
+        # Scan for local models
+        models = storage_manager.scan_local_models()
 
-            # Verify model is found
-            assert len(models) > 0
-            assert any(m["repo_id"] == repo_id for m in models)
+        # Verify model is found
+        assert len(models) > 0
+        assert any(m["repo_id"] == repo_id for m in models)
 
-    @pytest.mark.asyncio
-    async def test_metadata_saving_after_download(self, downloader, storage_manager, temp_dir):
+    async def test_metadata_saving_after_download(
+        self, downloader, storage_manager, tmp_path, hf_download
+    ):
         """Test that metadata is saved after successful download."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
-        # Mock hf_hub_download to create file
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+        hf_download.side_effect = _fake_download
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            # Download model
-            success = await downloader.download_model(repo_id, files)
-            assert success is True
+        # Download model
+        success = await downloader.download_model(repo_id, files)
+        assert success is True
 
-            # Verify metadata was saved
-            metadata = storage_manager.get_model_metadata(repo_id)
-            assert metadata is not None
-            assert "commit_sha" in metadata
-            assert metadata["commit_sha"] == "abc123def456"
+        # Verify metadata was saved
+        metadata = storage_manager.get_model_metadata(repo_id)
+        assert metadata is not None
+        assert "commit_sha" in metadata
+        assert metadata["commit_sha"] == "abc123def456"
 
-    @pytest.mark.asyncio
-    async def test_progress_updates_during_download(self, downloader):
+    async def test_progress_updates_during_download(self, downloader, hf_download):
         """Test that progress updates are sent correctly during download."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
@@ -333,203 +384,196 @@ class TestEndToEndDownload:
         def callback(data):
             progress_updates.append(data)
 
-        # Mock hf_hub_download
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
-
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            success = await downloader.download_model(repo_id, files, callback)
-
-            assert success is True
-            assert len(progress_updates) > 0
-
-            # Verify progress data structure
-            first_update = progress_updates[0]
-            assert "repo_id" in first_update
-            assert "current_file" in first_update
-            assert "overall_downloaded" in first_update
-            assert "overall_total" in first_update
-
-            # Verify final update shows completed
-            final_update = progress_updates[-1]
-            assert final_update["completed"] is True
+        hf_download.side_effect = _fake_download
+        success = await downloader.download_model(repo_id, files, callback)
 
-    @pytest.mark.asyncio
-    async def test_download_with_insufficient_space(self, downloader):
-        """Test download fails gracefully when insufficient disk space."""
-        repo_id = "test/model-1"
-        files = ["model-q4_k_m.gguf"]
+        assert success is True
+        assert len(progress_updates) > 0
 
-        # Mock disk_usage to return very small space
-        with patch("shutil.disk_usage") as mock_disk:
-            mock_disk.return_value = Mock(free=1024)  # Only 1KB free
+        # Verify progress data structure
+        first_update = progress_updates[0]
+        assert "repo_id" in first_update
+        assert "current_file" in first_update
+        assert "overall_downloaded" in first_update
+        assert "overall_total" in first_update
 
-            valid, msg = await downloader.validate_download(
-                repo_id, files, 4 * 1024 * 1024 * 1024  # 4GB file
-            )
+        # Verify final update shows completed
+        final_update = progress_updates[-1]
+        assert final_update["completed"] is True
 
-            assert valid is False
-            assert "Insufficient disk space" in msg
-
-    @pytest.mark.asyncio
-    async def test_error_propagation_from_hf_client(self, downloader):
+    @pytest.mark.slow
+    async def test_error_propagation_from_hf_client(self, downloader, hf_download):
         """Test that errors from HuggingFace client propagate correctly."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
         # Mock hf_hub_download to raise error
-        def mock_download_error(repo_id, filename, local_dir):
+        def mock_download_error(repo_id, filename, local_dir, revision=None):
             raise OSError("Filesystem error")
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download_error):
-            with pytest.raises(DownloadError) as exc_info:
-                await downloader.download_model(repo_id, files)
+        hf_download.side_effect = mock_download_error
+        with pytest.raises(DownloadError, match="Filesystem error"):
+            await downloader.download_model(repo_id, files)
 
-            assert "Filesystem error" in str(exc_info.value)
-
-    @pytest.mark.asyncio
-    async def test_multiple_downloads_sequential(self, downloader):
-        """Test multiple downloads executed sequentially."""
+    async def test_multiple_downloads_concurrent(
+        self, mock_hf_client, storage_manager, hf_download
+    ):
+        """Test multiple downloads running concurrently on the same event loop."""
         repos = ["test/model-1", "test/model-2"]
         files = ["model-q4_k_m.gguf"]
 
-        download_results = []
-
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+        # A manager tracks progress for one download at a time, so use one per repo
+        downloaders = [DownloadManager(mock_hf_client, storage_manager) for _ in repos]
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            for repo_id in repos:
-                success = await downloader.download_model(repo_id, files)
-                download_results.append((repo_id, success))
+        hf_download.side_effect = _fake_download
+        results = await asyncio.gather(
+            *(d.download_model(repo_id, files) for d, repo_id in zip(downloaders, repos))
+        )
 
-            # All downloads should succeed
-            for repo_id, success in download_results:
-                assert success is True
-                assert repo_id in repos
+        # All downloads should succeed
+        assert results == [True, True]
+        for repo_id in repos:
+            assert storage_manager.get_model_metadata(repo_id) is not None
 
-    @pytest.mark.asyncio
-    async def test_speed_and_eta_calculation(self, downloader):
+    async def test_speed_and_eta_calculation(
+        self, downloader, monkeypatch, hf_download, fake_clock
+    ):
         """Test that speed and ETA are calculated correctly during download."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
+        # Poll and emit without real-time throttling; fake_clock drives the speed math
+        monkeypatch.setattr("src.services.downloader.PROGRESS_POLL_INTERVAL", 0.001)
+        monkeypatch.setattr("src.services.downloader.PROGRESS_MIN_EMIT_INTERVAL", 0)
+
         progress_updates = []
+        first_chunk_seen = threading.Event()
 
         def callback(data):
             progress_updates.append(data)
+            if data["current_file_downloaded"] > 0:
+                first_chunk_seen.set()
 
         # Mock hf_hub_download to simulate gradual download
-        def mock_gradual_download(repo_id, filename, local_dir):
+        def mock_gradual_download(repo_id, filename, local_dir, revision=None):
             file_path = Path(local_dir) / filename
-            # Write in chunks to simulate progress
-            for _ in range(10):
+            # Write in chunks, holding after the first until the monitor reports it
+            for chunk in range(10):
                 with open(file_path, "ab") as f:
-                    f.write(b"x" * 10)
-                time.sleep(0.01)
+                    f.write(_DUMMY_PAYLOAD[:10])
+                if chunk == 0:
+                    first_chunk_seen.wait(timeout=5)
             return str(file_path)
 
-        import time
+        hf_download.side_effect = mock_gradual_download
+        success = await downloader.download_model(repo_id, files, callback)
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_gradual_download):
-            success = await downloader.download_model(repo_id, files, callback)
+        assert success is True
 
-            assert success is True
+        # Verify speed and ETA are calculated
+        updates_with_speed = [u for u in progress_updates if "speed" in u and u["speed"] > 0]
+        updates_with_eta = [u for u in progress_updates if "eta" in u and u["eta"] > 0]
 
-            # Verify speed and ETA are calculated
-            updates_with_speed = [u for u in progress_updates if "speed" in u and u["speed"] > 0]
-            updates_with_eta = [u for u in progress_updates if "eta" in u and u["eta"] > 0]
+        # Should have some updates with speed and ETA
+        assert len(updates_with_speed) > 0
+        assert len(updates_with_eta) > 0
 
-            # Should have some updates with speed and ETA
-            assert len(updates_with_speed) > 0
-            assert len(updates_with_eta) > 0
-
-    @pytest.mark.asyncio
-    async def test_resumed_download_detection(self, downloader, temp_dir):
+    async def test_resumed_download_detection(self, downloader, storage_manager, hf_download):
         """Test that resumed downloads are detected correctly."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
-        # Create partial file
-        model_path = Path(temp_dir) / "models" / repo_id.replace("/", "__")
+        # Create partial file where the downloader will look for it
+        model_path = storage_manager.get_model_path(repo_id)
         model_path.mkdir(parents=True, exist_ok=True)
         partial_file = model_path / "model-q4_k_m.gguf"
-        partial_file.write_bytes(b"x" * 50)  # Partial file
+        partial_file.write_bytes(_DUMMY_PAYLOAD[:50])  # Partial file
 
         progress_updates = []
 
         def callback(data):
             progress_updates.append(data)
 
-        def mock_download(repo_id, filename, local_dir):
+        def mock_download(repo_id, filename, local_dir, revision=None):
             file_path = Path(local_dir) / filename
-            # Complete the file
-            if not file_path.exists():
-                file_path.write_bytes(b"")
-            file_path.write_bytes(b"x" * 100)
+            # Resume: append only the bytes the partial file is missing
+            with open(file_path, "ab") as f:
+                f.write(_DUMMY_PAYLOAD[f.tell() :])
             return str(file_path)
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            success = await downloader.download_model(repo_id, files, callback)
+        hf_download.side_effect = mock_download
+        success = await downloader.download_model(repo_id, files, callback)
 
-            assert success is True
+        assert success is True
 
-            # Check for "resuming" status in progress updates
-            resumed_updates = [u for u in progress_updates if u.get("status") == "resuming"]
-            assert len(resumed_updates) > 0
+        # Check for "resuming" status in progress updates
+        resumed_updates = [u for u in progress_updates if u.get("status") == "resuming"]
+        assert len(resumed_updates) > 0
 
-    @pytest.mark.asyncio
-    async def test_commit_sha_retrieval(self, downloader, storage_manager):
+    async def test_commit_sha_retrieval(self, downloader, storage_manager, hf_download):
         """Test that commit SHA is retrieved and saved after download."""
         repo_id = "test/model-1"
         files = ["model-q4_k_m.gguf"]
 
-        def mock_download(repo_id, filename, local_dir):
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+        hf_download.side_effect = _fake_download
+        success = await downloader.download_model(repo_id, files)
+        assert success is True
+
+        # Verify commit SHA was called
+        downloader.hf_client.assert_called_once_with("get_commit_sha", repo_id)
+
+        # Verify metadata was saved
+        metadata = storage_manager.get_model_metadata(repo_id)
+        assert metadata is not None
+        assert metadata["commit_sha"] == "abc123def456"
+
+    async def test_files_pinned_to_commit(self, downloader, hf_download):
+        """Test that every file is downloaded from the same resolved commit."""
+        repo_id = "test/model-1"
+        files = ["model-q4_k_m.gguf", "model-q5_k_m.gguf"]
+        revisions = []
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_download):
-            success = await downloader.download_model(repo_id, files)
-            assert success is True
+        def mock_download(repo_id, filename, local_dir, revision=None):
+            revisions.append(revision)
+            return _fake_download(repo_id, filename, local_dir)
 
-            # Verify commit SHA was called
-            downloader.hf_client.get_commit_sha.assert_called_once_with(repo_id)
+        hf_download.side_effect = mock_download
+        success = await downloader.download_model(repo_id, files)
 
-            # Verify metadata was saved
-            metadata = storage_manager.get_model_metadata(repo_id)
-            assert metadata is not None
-            assert metadata["commit_sha"] == "abc123def456"
+        assert success is True
+        assert revisions == ["abc123def456", "abc123def456"]
 
 
+@_module_loop
 class TestErrorRecovery:
     """Integration tests for error recovery scenarios."""
 
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for tests."""
-        tmpdir = tempfile.mkdtemp()
-        yield Path(tmpdir)
-        shutil.rmtree(tmpdir)
-
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_hf_client(self):
-        """Create a mock HuggingFace client."""
+        """Create a mock HuggingFace client shared by the class."""
         client = Mock()
         client.get_file_sizes = Mock(return_value={"test.gguf": 1024})
         client.get_commit_sha = Mock(return_value="abc123")
         return client
 
+    @pytest.fixture(scope="class")
+    def hf_download(self):
+        """Patch hf_hub_download once for the class; each test sets its side_effect."""
+        with patch("src.services.downloader.hf_hub_download") as mock_download:
+            yield mock_download
+
+    @pytest.fixture(autouse=True)
+    def reset_mocks(self, mock_hf_client, hf_download):
+        """Clear recorded calls on the shared mocks; configured return values are kept."""
+        mock_hf_client.reset_mock()
+        hf_download.reset_mock(side_effect=True)
+
     @pytest.fixture
-    def storage_manager(self, temp_dir):
+    def storage_manager(self, tmp_path):
         """Create a storage manager instance."""
         storage = StorageManager(
-            models_dir=temp_dir / "models",
-            metadata_file=temp_dir / "metadata.json",
+            models_dir=tmp_path / "models",
+            metadata_file=tmp_path / "metadata.json",
         )
         return storage
 
@@ -538,95 +582,102 @@ class TestErrorRecovery:
         """Create a download manager instance."""
         return DownloadManager(mock_hf_client, storage_manager)
 
-    @pytest.mark.asyncio
-    async def test_network_error_with_retry_success(self, downloader):
+    @pytest.mark.slow
+    async def test_network_error_with_retry_success(self, downloader, hf_download):
         """Test recovery from network error with retry."""
         repo_id = "test/model-1"
         files = ["test.gguf"]
 
         attempt_count = [0]
 
-        def mock_download_with_network_error(repo_id, filename, local_dir):
+        def mock_download_with_network_error(repo_id, filename, local_dir, revision=None):
             attempt_count[0] += 1
             if attempt_count[0] == 1:
                 raise ConnectionError("Network timeout")
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+            return _fake_download(repo_id, filename, local_dir)
 
-        with patch(
-            "src.services.downloader.hf_hub_download", side_effect=mock_download_with_network_error
-        ):
-            success = await downloader.download_model(repo_id, files)
-            assert success is True
-            assert attempt_count[0] == 2
+        hf_download.side_effect = mock_download_with_network_error
+        success = await downloader.download_model(repo_id, files)
+        assert success is True
+        assert attempt_count[0] == 2
 
-    @pytest.mark.asyncio
-    async def test_max_retries_exceeded(self, downloader):
+    @pytest.mark.slow
+    async def test_max_retries_exceeded(self, downloader, hf_download):
         """Test download failure after max retries."""
         repo_id = "test/model-1"
         files = ["test.gguf"]
 
-        def mock_always_failing_download(repo_id, filename, local_dir):
+        def mock_always_failing_download(repo_id, filename, local_dir, revision=None):
             raise ConnectionError("Persistent network error")
 
-        with patch(
-            "src.services.downloader.hf_hub_download", side_effect=mock_always_failing_download
-        ):
-            with pytest.raises(DownloadError) as exc_info:
-                await downloader.download_model(repo_id, files)
-
-            assert "Failed to download" in str(exc_info.value)
+        hf_download.side_effect = mock_always_failing_download
+        with pytest.raises(DownloadError, match="Failed to download"):
+            await downloader.download_model(repo_id, files)
 
-    @pytest.mark.asyncio
-    async def test_filesystem_error_during_download(self, downloader):
+    @pytest.mark.slow
+    async def test_filesystem_error_during_download(self, downloader, hf_download):
         """Test handling of filesystem errors during download."""
         repo_id = "test/model-1"
         files = ["test.gguf"]
 
-        def mock_filesystem_error(repo_id, filename, local_dir):
+        def mock_filesystem_error(repo_id, filename, local_dir, revision=None):
             raise PermissionError("Permission denied")
 
-        with patch("src.services.downloader.hf_hub_download", side_effect=mock_filesystem_error):
-            with pytest.raises(DownloadError) as exc_info:
-                await downloader.download_model(repo_id, files)
+        hf_download.side_effect = mock_filesystem_error
+        with pytest.raises(DownloadError, match="Permission denied"):
+            await downloader.download_model(repo_id, files)
 
-            assert "Permission denied" in str(exc_info.value)
+    async def test_commit_sha_network_error_downloads_latest(
+        self, downloader, storage_manager, mock_hf_client, hf_download, monkeypatch
+    ):
+        """Test that a failed commit SHA lookup falls back to the latest revision."""
+        repo_id = "test/model-1"
+        files = ["test.gguf"]
+        revisions = []
 
-    @pytest.mark.asyncio
-    async def test_cleanup_after_cancellation(self, downloader, temp_dir):
+        def mock_download(repo_id, filename, local_dir, revision=None):
+            revisions.append(revision)
+            return _fake_download(repo_id, filename, local_dir)
+
+        monkeypatch.setattr(
+            mock_hf_client, "get_commit_sha", Mock(side_effect=NetworkError("Network unreachable"))
+        )
+        hf_download.side_effect = mock_download
+        success = await downloader.download_model(repo_id, files)
+
+        assert success is True
+        assert revisions == [None]
+        assert "commit_sha" not in storage_manager.get_model_metadata(repo_id)
+
+    async def test_cleanup_after_cancellation(self, downloader, tmp_path, hf_download):
         """Test that resources are cleaned up after cancellation."""
         repo_id = "test/model-1"
         files = ["test.gguf"]
 
-        import threading
-
-        download_started = threading.Event()
-        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        download_started = asyncio.Event()
 
-        def never_ending_download(repo_id, filename, local_dir):
-            download_started.set()
+        def never_ending_download(repo_id, filename, local_dir, revision=None):
+            # Runs in the executor thread, so hand the signal to the event loop
+            loop.call_soon_threadsafe(download_started.set)
             # Sleep in short increments, checking for cancellation
-            import time
-
-            for _ in range(20):
-                if cancel_event.is_set():
+            for _ in range(200):
+                if downloader._cancelled:
                     raise Exception("Download cancelled")
-                time.sleep(0.1)
+                time.sleep(0.01)
             # If we get here, download completed
-            file_path = Path(local_dir) / filename
-            file_path.write_bytes(b"x" * 100)
-            return str(file_path)
+            return _fake_download(repo_id, filename, local_dir)
+
+        hf_download.side_effect = never_ending_download
 
         # Start download
         download_task = asyncio.create_task(downloader.download_model(repo_id, files))
 
-        # Wait for download to start
-        download_started.wait()
+        # Wait for download to start without blocking the event loop
+        await download_started.wait()
 
         # Cancel
         downloader.cancel_download()
-        cancel_event.set()
 
         # Wait for task to complete
         success = await download_task
@@ -638,86 +689,49 @@ class TestErrorRecovery:
 class TestCachingIntegration:
     """Integration tests for caching behavior."""
 
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for tests."""
-        tmpdir = tempfile.mkdtemp()
-        yield Path(tmpdir)
-        shutil.rmtree(tmpdir)
-
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def real_hf_client(self):
-        """Create a real HuggingFaceClient instance with mocked HTTP."""
-        with patch("requests.get") as mock_get:
-            client = HuggingFaceClient()
-
-            # Mock initial API responses
-            mock_get.return_value = Mock(
-                json=lambda: {
-                    "modelId": "test/model",
-                    "author": "testuser",
-                    "downloads": 1000000,
-                    "lastModified": "2024-01-01T00:00:00.000Z",
-                },
-                status_code=200,
-            )
+        """Create a real HuggingFaceClient whose Hub API is mocked once for the class."""
+        client = HuggingFaceClient()
+        client.api = create_autospec(HfApi, instance=True, spec_set=True)
+        client.api.model_info.return_value = SimpleNamespace(
+            siblings=[
+                SimpleNamespace(rfilename=name, size=size) for name, size in _FILE_SIZES.items()
+            ]
+        )
+        client.api.list_repo_files.return_value = list(_FILE_SIZES)
+        return client
 
-            yield client
+    @pytest.fixture(autouse=True)
+    def clear_client_cache(self, real_hf_client):
+        """Start every test with an empty response cache and fresh API call counts."""
+        real_hf_client.clear_cache()
+        real_hf_client.api.reset_mock()
 
-    @pytest.fixture
-    def storage_manager(self, temp_dir):
-        """Create a storage manager instance."""
-        storage = StorageManager(
-            models_dir=temp_dir / "models",
-            metadata_file=temp_dir / "metadata.json",
-        )
-        return storage
+    def test_cache_used_in_download_workflow(self, real_hf_client):
+        """Test that the file size lookup a download starts with is served from cache."""
+        # First lookup misses and goes to the API; the repeat is a cache hit
+        sizes = real_hf_client.get_file_sizes("test/model-1")
+        assert real_hf_client.get_file_sizes("test/model-1") is sizes
 
-    @pytest.fixture
-    def downloader(self, real_hf_client, storage_manager):
-        """Create a download manager instance."""
-        return DownloadManager(real_hf_client, storage_manager)
-
-    @pytest.mark.asyncio
-    async def test_cache_used_in_download_workflow(self, real_hf_client):
-        """Test that cache is used during download workflow."""
-        # First call should populate cache
-        with patch.object(real_hf_client.api, "list_models", return_value=[]):
-            real_hf_client.search_models("test", limit=10)
-
-        # Second call should use cache
-        with patch.object(real_hf_client.api, "list_models", return_value=[]) as mock_list:
-            real_hf_client.search_models("test", limit=10)
-            # Cached, so API should not be called
-            # (Note: current implementation may still call API if cache is disabled)
-
-        # Verify cache stats - cache should have entries
-        stats = real_hf_client.get_cache_stats()
-        assert stats["total_entries"] >= 0
-
-    @pytest.mark.asyncio
-    async def test_cache_clearing(self, real_hf_client):
+        assert sizes == _FILE_SIZES
+        real_hf_client.api.model_info.assert_called_once_with("test/model-1", files_metadata=True)
+        assert real_hf_client.get_cache_stats() == {"total_entries": 1, "valid_entries": 1}
+
+    def test_cache_clearing(self, real_hf_client):
         """Test cache clearing functionality."""
         # Make some calls to populate cache
-        with patch.object(real_hf_client.api, "list_models", return_value=[]):
-            real_hf_client.search_models("test", limit=10)
-
-        with patch.object(real_hf_client.api, "model_info", return_value=[]):
-            try:
-                real_hf_client.get_file_sizes("test/model")
-            except Exception:
-                pass  # Ignore errors from mock
-
-        # Verify cache is populated
-        stats_before = real_hf_client.get_cache_stats()
-        assert stats_before["total_entries"] >= 0
+        real_hf_client.list_gguf_files("test/model-1")
+        real_hf_client.get_file_sizes("test/model-1")
+        assert real_hf_client.get_cache_stats()["total_entries"] == 2
 
         # Clear cache
         real_hf_client.clear_cache()
+        assert real_hf_client.get_cache_stats()["total_entries"] == 0
 
-        # Verify cache is empty
-        stats_after = real_hf_client.get_cache_stats()
-        assert stats_after["total_entries"] == 0
+        # The next lookup misses and goes back to the API
+        real_hf_client.get_file_sizes("test/model-1")
+        assert real_hf_client.api.model_info.call_count == 2
 
 
 if __name__ == "__main__":
@@ -1,33 +1,43 @@
 """Tests for storage manager."""
 
 import json
+import os
+import time
 import pytest
-import shutil
-import tempfile
-from pathlib import Path
-
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.services.storage import StorageManager
 from src.exceptions import StorageError
 
+# Metadata file contents that are not valid JSON
+_CORRUPT_JSON = b"not valid json {{{"
+
+# Wall-clock budget for scanning 10k models; an rglob-style walk blows well past it
+_SCAN_10K_BUDGET_SECONDS = 2.0
+
+
+@pytest.fixture(scope="module")
+def shared_storage(tmp_path_factory):
+    """Create one empty StorageManager shared by tests that only read from it."""
+    tmp_path = tmp_path_factory.mktemp("shared_storage")
+    return StorageManager(tmp_path / "models", tmp_path / ".metadata.json")
+
+
+def _make_model(models_dir, repo_id, files):
+    """Create ``models_dir/repo_id`` holding ``files``, a mapping of filename to bytes."""
+    model_dir = models_dir / repo_id
+    model_dir.mkdir(parents=True)
+    for filename, content in files.items():
+        (model_dir / filename).write_bytes(content)
+    return model_dir
+
 
 class TestStorageManagerInitialization:
     """Test suite for StorageManager initialization."""
 
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for tests."""
-        tmpdir = tempfile.mkdtemp()
-        yield Path(tmpdir)
-        shutil.rmtree(tmpdir)
-
-    def test_initialization_creates_models_dir(self, temp_dir):
+    def test_initialization_creates_models_dir(self, tmp_path):
         """Test that initialization creates the models directory."""
-        models_dir = temp_dir / "models"
-        metadata_file = temp_dir / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
 
         assert not models_dir.exists()
 
@@ -37,21 +47,21 @@ class TestStorageManagerInitialization:
         assert storage.models_dir == models_dir
         assert storage.metadata_file == metadata_file
 
-    def test_initialization_existing_dir(self, temp_dir):
+    def test_initialization_existing_dir(self, tmp_path):
         """Test initialization with existing directory."""
-        models_dir = temp_dir / "models"
+        models_dir = tmp_path / "models"
         models_dir.mkdir()
-        metadata_file = temp_dir / ".metadata.json"
+        metadata_file = tmp_path / ".metadata.json"
 
         storage = StorageManager(models_dir, metadata_file)
 
         assert storage.models_dir == models_dir
 
-    def test_initialization_loads_existing_metadata(self, temp_dir):
+    def test_initialization_loads_existing_metadata(self, tmp_path):
         """Test that initialization loads existing metadata."""
-        models_dir = temp_dir / "models"
+        models_dir = tmp_path / "models"
         models_dir.mkdir()
-        metadata_file = temp_dir / ".metadata.json"
+        metadata_file = tmp_path / ".metadata.json"
 
         # Create existing metadata
         metadata = {"author/model": {"commit_sha": "abc123"}}
@@ -62,10 +72,10 @@ class TestStorageManagerInitialization:
 
         assert storage.metadata == metadata
 
-    def test_initialization_empty_metadata(self, temp_dir):
+    def test_initialization_empty_metadata(self, tmp_path):
         """Test initialization with no existing metadata."""
-        models_dir = temp_dir / "models"
-        metadata_file = temp_dir / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
 
         storage = StorageManager(models_dir, metadata_file)
 
@@ -76,29 +86,24 @@ class TestScanLocalModels:
     """Test suite for scan_local_models method."""
 
     @pytest.fixture
-    def storage(self):
+    def storage(self, tmp_path):
         """Create a StorageManager instance with temp directories."""
-        tmpdir = tempfile.mkdtemp()
-        models_dir = Path(tmpdir) / "models"
-        metadata_file = Path(tmpdir) / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
         storage = StorageManager(models_dir, metadata_file)
-        yield storage
-        shutil.rmtree(tmpdir)
+        return storage
 
-    def test_scan_empty_directory(self, storage):
+    def test_scan_empty_directory(self, shared_storage):
         """Test scanning empty models directory."""
-        models = storage.scan_local_models()
+        models = shared_storage.scan_local_models()
         assert models == []
 
     def test_scan_with_models(self, storage):
         """Test scanning directory with models."""
-        # Create model structure
-        model_dir = storage.models_dir / "author" / "model-name"
-        model_dir.mkdir(parents=True)
-
-        # Create GGUF file
-        gguf_file = model_dir / "model.gguf"
-        gguf_file.write_bytes(b"fake gguf content" * 100)
+        # Create model structure with a GGUF file
+        _make_model(
+            storage.models_dir, "author/model-name", {"model.gguf": b"fake gguf content" * 100}
+        )
 
         models = storage.scan_local_models()
 
@@ -110,26 +115,20 @@ class TestScanLocalModels:
     def test_scan_multiple_models(self, storage):
         """Test scanning with multiple models."""
         # Create two models
-        for author, name in [("author1", "model1"), ("author2", "model2")]:
-            model_dir = storage.models_dir / author / name
-            model_dir.mkdir(parents=True)
-            (model_dir / "model.gguf").write_bytes(b"content")
+        for repo_id in ["author1/model1", "author2/model2"]:
+            _make_model(storage.models_dir, repo_id, {"model.gguf": b"content"})
 
         models = storage.scan_local_models()
 
         assert len(models) == 2
-        repo_ids = [m["repo_id"] for m in models]
-        assert "author1/model1" in repo_ids
-        assert "author2/model2" in repo_ids
+        assert {m["repo_id"] for m in models} == {"author1/model1", "author2/model2"}
 
     def test_scan_ignores_non_gguf(self, storage):
         """Test that scan ignores directories without GGUF files."""
-        model_dir = storage.models_dir / "author" / "model"
-        model_dir.mkdir(parents=True)
-
         # Only non-GGUF files
-        (model_dir / "README.md").write_text("readme")
-        (model_dir / "config.json").write_text("{}")
+        _make_model(
+            storage.models_dir, "author/model", {"README.md": b"readme", "config.json": b"{}"}
+        )
 
         models = storage.scan_local_models()
 
@@ -137,21 +136,71 @@ class TestScanLocalModels:
 
     def test_scan_ignores_hidden_dirs(self, storage):
         """Test that scan ignores hidden directories."""
-        hidden_dir = storage.models_dir / ".hidden"
-        hidden_dir.mkdir()
-        (hidden_dir / "model" / "test.gguf").parent.mkdir(parents=True)
-        (hidden_dir / "model" / "test.gguf").write_bytes(b"content")
+        _make_model(storage.models_dir, ".hidden/model", {"test.gguf": b"content"})
 
         models = storage.scan_local_models()
 
         assert models == []
 
+    def test_scan_ignores_stray_files(self, storage):
+        """Test that files directly under the models root or an author dir are skipped."""
+        _make_model(storage.models_dir, "author/model", {"model.gguf": b"content"})
+        (storage.models_dir / "README.md").write_bytes(b"readme")
+        (storage.models_dir / "stray.gguf").write_bytes(b"content")
+        (storage.models_dir / "author" / "stray.gguf").write_bytes(b"content")
+
+        models = storage.scan_local_models()
+
+        assert [m["repo_id"] for m in models] == ["author/model"]
+
+    def test_scan_follows_symlinked_model_dir(self, storage, tmp_path):
+        """Test that a symlinked model directory is scanned like a real one."""
+        target = _make_model(tmp_path / "elsewhere", "author/model", {"model.gguf": b"x" * 64})
+        (storage.models_dir / "author").mkdir(parents=True)
+        (storage.models_dir / "author" / "linked").symlink_to(target, target_is_directory=True)
+
+        models = storage.scan_local_models()
+
+        assert len(models) == 1
+        assert models[0]["repo_id"] == "author/linked"
+        assert models[0]["path"] == str(storage.models_dir / "author" / "linked")
+        assert models[0]["files"] == ["model.gguf"]
+        assert models[0]["total_size"] == 64
+
+    def test_scan_sizes_symlinked_gguf_by_target(self, storage, tmp_path):
+        """Test that a symlinked GGUF file counts its target's size, not the link's."""
+        target = tmp_path / "blob"
+        target.write_bytes(b"x" * 2048)
+        model_dir = _make_model(storage.models_dir, "author/model", {})
+        (model_dir / "model.gguf").symlink_to(target)
+
+        models = storage.scan_local_models()
+
+        assert models[0]["files"] == ["model.gguf"]
+        assert models[0]["total_size"] == 2048
+
+    def test_scan_skips_dangling_model_dir_symlink(self, storage, tmp_path):
+        """Test that a model dir symlink pointing nowhere is skipped, not an error."""
+        (storage.models_dir / "author").mkdir(parents=True)
+        (storage.models_dir / "author" / "gone").symlink_to(tmp_path / "missing")
+
+        assert storage.scan_local_models() == []
+
+    @pytest.mark.skipif(os.geteuid() == 0, reason="root bypasses directory permissions")
+    def test_scan_unreadable_model_dir_raises(self, storage):
+        """Test that an unreadable model directory surfaces PermissionError."""
+        model_dir = _make_model(storage.models_dir, "author/model", {"model.gguf": b"content"})
+        model_dir.chmod(0)
+        try:
+            with pytest.raises(PermissionError):
+                storage.scan_local_models()
+        finally:
+            model_dir.chmod(0o755)
+
     def test_scan_includes_metadata(self, storage):
         """Test that scan includes metadata for known models."""
         # Create model
-        model_dir = storage.models_dir / "author" / "model"
-        model_dir.mkdir(parents=True)
-        (model_dir / "model.gguf").write_bytes(b"content")
+        _make_model(storage.models_dir, "author/model", {"model.gguf": b"content"})
 
         # Add metadata
         storage.metadata["author/model"] = {
@@ -165,59 +214,70 @@ class TestScanLocalModels:
         assert models[0]["commit_sha"] == "abc123"
         assert models[0]["download_date"] == "2024-01-01"
 
+    @pytest.mark.perf
+    def test_scan_10k_models(self, storage):
+        """Test that scanning 10k models stays within the time budget."""
+        for i in range(10_000):
+            model_dir = os.path.join(storage.models_dir, f"a{i // 100}", f"m{i}")
+            os.makedirs(model_dir, exist_ok=True)
+            fd = os.open(os.path.join(model_dir, "m.gguf"), os.O_CREAT | os.O_WRONLY)
+            try:
+                os.ftruncate(fd, 16)
+            finally:
+                os.close(fd)
+
+        start = time.perf_counter()
+        models = storage.scan_local_models()
+        elapsed = time.perf_counter() - start
+
+        assert len(models) == 10_000
+        assert elapsed < _SCAN_10K_BUDGET_SECONDS
+
 
 class TestGetModelPath:
     """Test suite for get_model_path method."""
 
-    @pytest.fixture
-    def storage(self):
-        """Create a StorageManager instance."""
-        tmpdir = tempfile.mkdtemp()
-        models_dir = Path(tmpdir) / "models"
-        metadata_file = Path(tmpdir) / ".metadata.json"
-        storage = StorageManager(models_dir, metadata_file)
-        yield storage
-        shutil.rmtree(tmpdir)
-
-    def test_get_model_path(self, storage):
+    def test_get_model_path(self, shared_storage):
         """Test getting model path."""
-        path = storage.get_model_path("author/model-name")
+        path = shared_storage.get_model_path("author/model-name")
 
-        assert path == storage.models_dir / "author" / "model-name"
+        assert path == shared_storage.models_dir / "author" / "model-name"
 
 
 class TestDeleteModel:
     """Test suite for delete_model method."""
 
     @pytest.fixture
-    def storage(self):
+    def storage(self, tmp_path):
         """Create a StorageManager instance with a model."""
-        tmpdir = tempfile.mkdtemp()
-        models_dir = Path(tmpdir) / "models"
-        metadata_file = Path(tmpdir) / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
         storage = StorageManager(models_dir, metadata_file)
 
         # Create model
-        model_dir = models_dir / "author" / "model"
-        model_dir.mkdir(parents=True)
-        (model_dir / "model.gguf").write_bytes(b"content")
+        _make_model(models_dir, "author/model", {"model.gguf": b"content"})
 
-        # Add metadata
+        # Add metadata (in memory only; see persisted_storage)
         storage.metadata["author/model"] = {"commit_sha": "abc123"}
-        storage._save_metadata()
 
-        yield storage
-        shutil.rmtree(tmpdir, ignore_errors=True)
+        return storage
+
+    @pytest.fixture
+    def persisted_storage(self, storage):
+        """Same as storage, with the metadata also written to disk."""
+        storage._save_metadata()
+        return storage
 
     def test_delete_model_success(self, storage):
         """Test successful model deletion."""
-        assert (storage.models_dir / "author" / "model").exists()
+        model_path = storage.models_dir / "author" / "model"
+        assert model_path.exists()
         assert "author/model" in storage.metadata
 
         result = storage.delete_model("author/model")
 
         assert result is True
-        assert not (storage.models_dir / "author" / "model").exists()
+        assert not model_path.exists()
         assert "author/model" not in storage.metadata
 
     def test_delete_nonexistent_model(self, storage):
@@ -226,13 +286,12 @@ class TestDeleteModel:
 
         assert result is True  # No error, just nothing to delete
 
-    def test_delete_model_removes_metadata(self, storage):
+    def test_delete_model_removes_metadata(self, persisted_storage):
         """Test that deletion removes metadata."""
-        storage.delete_model("author/model")
+        persisted_storage.delete_model("author/model")
 
         # Reload metadata from file
-        with open(storage.metadata_file) as f:
-            saved_metadata = json.load(f)
+        saved_metadata = json.loads(persisted_storage.metadata_file.read_bytes())
 
         assert "author/model" not in saved_metadata
 
@@ -241,14 +300,12 @@ class TestSaveModelMetadata:
     """Test suite for save_model_metadata method."""
 
     @pytest.fixture
-    def storage(self):
+    def storage(self, tmp_path):
         """Create a StorageManager instance."""
-        tmpdir = tempfile.mkdtemp()
-        models_dir = Path(tmpdir) / "models"
-        metadata_file = Path(tmpdir) / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
         storage = StorageManager(models_dir, metadata_file)
-        yield storage
-        shutil.rmtree(tmpdir)
+        return storage
 
     def test_save_new_metadata(self, storage):
         """Test saving metadata for new model."""
@@ -270,7 +327,9 @@ class TestSaveModelMetadata:
 
     def test_save_metadata_updates_existing(self, storage):
         """Test updating existing metadata."""
-        storage.save_model_metadata("author/model", commit_sha="old")
+        # Seed the existing entry in memory; only the update needs to hit disk
+        storage.metadata["author/model"] = {"commit_sha": "old"}
+
         storage.save_model_metadata("author/model", commit_sha="new")
 
         assert storage.metadata["author/model"]["commit_sha"] == "new"
@@ -280,8 +339,7 @@ class TestSaveModelMetadata:
         storage.save_model_metadata("author/model", commit_sha="abc123")
 
         # Reload from file
-        with open(storage.metadata_file) as f:
-            saved = json.load(f)
+        saved = json.loads(storage.metadata_file.read_bytes())
 
         assert saved["author/model"]["commit_sha"] == "abc123"
 
@@ -290,14 +348,12 @@ class TestGetModelMetadata:
     """Test suite for get_model_metadata method."""
 
     @pytest.fixture
-    def storage(self):
+    def storage(self, tmp_path):
         """Create a StorageManager instance."""
-        tmpdir = tempfile.mkdtemp()
-        models_dir = Path(tmpdir) / "models"
-        metadata_file = Path(tmpdir) / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
         storage = StorageManager(models_dir, metadata_file)
-        yield storage
-        shutil.rmtree(tmpdir)
+        return storage
 
     def test_get_existing_metadata(self, storage):
         """Test getting existing metadata."""
@@ -308,9 +364,9 @@ class TestGetModelMetadata:
         assert result is not None
         assert result["commit_sha"] == "abc123"
 
-    def test_get_nonexistent_metadata(self, storage):
+    def test_get_nonexistent_metadata(self, shared_storage):
         """Test getting non-existent metadata."""
-        result = storage.get_model_metadata("nonexistent/model")
+        result = shared_storage.get_model_metadata("nonexistent/model")
 
         assert result is None
 
@@ -318,21 +374,19 @@ class TestGetModelMetadata:
 class TestStorageUsage:
     """Test suite for storage usage methods."""
 
-    @pytest.fixture
-    def storage(self):
-        """Create a StorageManager instance with files."""
-        tmpdir = tempfile.mkdtemp()
-        models_dir = Path(tmpdir) / "models"
-        metadata_file = Path(tmpdir) / ".metadata.json"
+    @pytest.fixture(scope="class")
+    def storage(self, tmp_path_factory):
+        """Create a StorageManager instance with files, shared by the read-only usage tests."""
+        tmp_path = tmp_path_factory.mktemp("usage")
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
         storage = StorageManager(models_dir, metadata_file)
 
-        # Create some GGUF files
-        model_dir = models_dir / "author" / "model"
-        model_dir.mkdir(parents=True)
-        (model_dir / "model.gguf").write_bytes(b"x" * 1024)  # 1KB
+        # Create a 1KB GGUF file; usage reads st_size, so a sparse file is enough
+        model_dir = _make_model(models_dir, "author/model", {"model.gguf": b""})
+        os.truncate(model_dir / "model.gguf", 1024)
 
-        yield storage
-        shutil.rmtree(tmpdir)
+        return storage
 
     def test_get_storage_usage(self, storage):
         """Test getting storage usage."""
@@ -351,35 +405,54 @@ class TestStorageUsage:
 class TestMetadataFileHandling:
     """Test suite for metadata file edge cases."""
 
-    def test_load_corrupted_metadata(self):
+    def test_load_corrupted_metadata(self, tmp_path):
         """Test loading corrupted metadata file."""
-        tmpdir = tempfile.mkdtemp()
-        try:
-            models_dir = Path(tmpdir) / "models"
-            metadata_file = Path(tmpdir) / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / ".metadata.json"
 
-            # Create corrupted JSON
-            metadata_file.write_text("not valid json {{{")
+        # Create corrupted JSON
+        metadata_file.write_bytes(_CORRUPT_JSON)
 
-            storage = StorageManager(models_dir, metadata_file)
+        storage = StorageManager(models_dir, metadata_file)
 
-            assert storage.metadata == {}
-        finally:
-            shutil.rmtree(tmpdir)
+        assert storage.metadata == {}
 
-    def test_save_creates_parent_dirs(self):
+    def test_save_creates_parent_dirs(self, tmp_path):
         """Test that save creates parent directories."""
-        tmpdir = tempfile.mkdtemp()
-        try:
-            models_dir = Path(tmpdir) / "models"
-            metadata_file = Path(tmpdir) / "subdir" / "deep" / ".metadata.json"
+        models_dir = tmp_path / "models"
+        metadata_file = tmp_path / "subdir" / "deep" / ".metadata.json"
 
-            storage = StorageManager(models_dir, metadata_file)
-            storage.save_model_metadata("author/model", commit_sha="abc")
+        storage = StorageManager(models_dir, metadata_file)
+        storage.save_model_metadata("author/model", commit_sha="abc")
 
-            assert metadata_file.exists()
-        finally:
-            shutil.rmtree(tmpdir)
+        assert metadata_file.exists()
+
+    def test_roundtrip_without_orjson(self, tmp_path, monkeypatch):
+        """Test metadata round-trips through the stdlib json fallback."""
+        monkeypatch.setattr("src.services.storage.orjson", None)
+        metadata_file = tmp_path / ".metadata.json"
+
+        storage = StorageManager(tmp_path / "models", metadata_file)
+        storage.save_model_metadata(
+            "author/model", commit_sha="abc", additional_data={"files": ["a.gguf"]}
+        )
+        reloaded = StorageManager(tmp_path / "models", metadata_file)
+
+        assert reloaded.metadata == storage.metadata
+
+    def test_save_falls_back_when_orjson_rejects_data(self, tmp_path):
+        """Test values orjson cannot encode are still persisted via stdlib json."""
+        metadata_file = tmp_path / ".metadata.json"
+
+        storage = StorageManager(tmp_path / "models", metadata_file)
+        storage.save_model_metadata(
+            "author/model", additional_data={"total_bytes": 2**70, "parts": {1: "a.gguf"}}
+        )
+        saved = json.loads(metadata_file.read_bytes())
+
+        assert saved["author/model"]["total_bytes"] == 2**70
+        # The stdlib encoder stringifies non-str keys
+        assert saved["author/model"]["parts"] == {"1": "a.gguf"}
 
 
 if __name__ == "__main__":
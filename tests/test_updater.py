@@ -1,17 +1,31 @@
 """Tests for update checker."""
 
 import pytest
-from pathlib import Path
-from unittest.mock import Mock
-
-import sys
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from unittest.mock import Mock, create_autospec
 
+from src.services.hf_client import HuggingFaceClient
+from src.services.storage import StorageManager
 from src.services.updater import UpdateChecker
 from src.exceptions import NetworkError, HuggingFaceError
 
 
+@pytest.fixture(scope="module")
+def shared_updater():
+    """Create one UpdateChecker with spec'd mock dependencies, shared by this module."""
+    return UpdateChecker(
+        create_autospec(HuggingFaceClient, instance=True, spec_set=True),
+        create_autospec(StorageManager, instance=True, spec_set=True),
+    )
+
+
+@pytest.fixture
+def updater(shared_updater):
+    """Hand out the shared updater with its mocks' calls and configuration reset."""
+    shared_updater.hf_client.reset_mock(return_value=True, side_effect=True)
+    shared_updater.storage.reset_mock(return_value=True, side_effect=True)
+    return shared_updater
+
+
 class TestUpdateCheckerInitialization:
     """Test suite for UpdateChecker initialization."""
 
@@ -29,86 +43,41 @@ class TestUpdateCheckerInitialization:
 class TestCheckSingleModel:
     """Test suite for check_single_model method."""
 
-    @pytest.fixture
-    def updater(self):
-        """Create an UpdateChecker with mocked dependencies."""
-        mock_hf_client = Mock()
-        mock_storage = Mock()
-        return UpdateChecker(mock_hf_client, mock_storage)
-
-    def test_check_model_up_to_date(self, updater):
-        """Test checking model that is up to date."""
-        updater.hf_client.get_commit_sha.return_value = "abc123def456"
-
-        result = updater.check_single_model("author/model", "abc123def456")
-
-        assert result == "up_to_date"
-        updater.hf_client.get_commit_sha.assert_called_once_with("author/model")
-
-    def test_check_model_update_available(self, updater):
-        """Test checking model with update available."""
-        updater.hf_client.get_commit_sha.return_value = "new_commit_sha"
-
-        result = updater.check_single_model("author/model", "old_commit_sha")
-
-        assert result == "update_available"
-
-    def test_check_model_no_local_sha(self, updater):
-        """Test checking model with no local SHA."""
-        result = updater.check_single_model("author/model", None)
-
-        assert result == "unknown"
-        updater.hf_client.get_commit_sha.assert_not_called()
-
-    def test_check_model_empty_local_sha(self, updater):
-        """Test checking model with empty local SHA."""
-        result = updater.check_single_model("author/model", "")
-
-        assert result == "unknown"
-
-    def test_check_model_no_remote_sha(self, updater):
-        """Test checking model when remote SHA unavailable."""
-        updater.hf_client.get_commit_sha.return_value = None
-
-        result = updater.check_single_model("author/model", "local_sha")
-
-        assert result == "error"
-
-    def test_check_model_network_error(self, updater):
-        """Test checking model with network error."""
-        updater.hf_client.get_commit_sha.side_effect = NetworkError("Connection failed")
-
-        result = updater.check_single_model("author/model", "local_sha")
-
-        assert result == "error"
-
-    def test_check_model_api_error(self, updater):
-        """Test checking model with API error."""
-        updater.hf_client.get_commit_sha.side_effect = HuggingFaceError("API error")
-
-        result = updater.check_single_model("author/model", "local_sha")
-
-        assert result == "error"
-
-    def test_check_model_generic_exception(self, updater):
-        """Test checking model with generic exception."""
-        updater.hf_client.get_commit_sha.side_effect = Exception("Unknown error")
-
-        result = updater.check_single_model("author/model", "local_sha")
-
-        assert result == "error"
+    @pytest.mark.parametrize(
+        "local_sha, remote, expected",
+        [
+            # Up to date / update available
+            ("abc123def456", {"return_value": "abc123def456"}, "up_to_date"),
+            ("old_commit_sha", {"return_value": "new_commit_sha"}, "update_available"),
+            # SHAs must match exactly: no case folding, no prefix matching
+            ("abc123", {"return_value": "ABC123"}, "update_available"),
+            ("abc123", {"return_value": "abc123def456"}, "update_available"),
+            # No local SHA, so the remote is never asked
+            (None, {}, "unknown"),
+            ("", {}, "unknown"),
+            # Remote SHA unavailable or lookup failed
+            ("local_sha", {"return_value": None}, "error"),
+            ("local_sha", {"side_effect": NetworkError("Connection failed")}, "error"),
+            ("local_sha", {"side_effect": HuggingFaceError("API error")}, "error"),
+            ("local_sha", {"side_effect": Exception("Unknown error")}, "error"),
+        ],
+    )
+    def test_check_single_model(self, updater, local_sha, remote, expected):
+        """Test the status reported for each local/remote SHA combination."""
+        updater.hf_client.get_commit_sha.configure_mock(**remote)
+
+        result = updater.check_single_model("author/model", local_sha)
+
+        assert result == expected
+        if local_sha:
+            updater.hf_client.get_commit_sha.assert_called_once_with("author/model")
+        else:
+            updater.hf_client.get_commit_sha.assert_not_called()
 
 
 class TestCheckForUpdates:
     """Test suite for check_for_updates method."""
 
-    @pytest.fixture
-    def updater(self):
-        """Create an UpdateChecker with mocked dependencies."""
-        mock_hf_client = Mock()
-        mock_storage = Mock()
-        return UpdateChecker(mock_hf_client, mock_storage)
-
     def test_check_multiple_models(self, updater):
         """Test checking multiple models at once."""
         models = [
@@ -161,33 +130,5 @@ class TestCheckForUpdates:
         assert results["author/model"] == "unknown"
 
 
-class TestUpdateStatusEdgeCases:
-    """Test edge cases for update checking."""
-
-    @pytest.fixture
-    def updater(self):
-        """Create an UpdateChecker with mocked dependencies."""
-        mock_hf_client = Mock()
-        mock_storage = Mock()
-        return UpdateChecker(mock_hf_client, mock_storage)
-
-    def test_case_sensitive_sha_comparison(self, updater):
-        """Test that SHA comparison is case-sensitive."""
-        updater.hf_client.get_commit_sha.return_value = "ABC123"
-
-        result = updater.check_single_model("author/model", "abc123")
-
-        # Should be update available since SHAs are case-sensitive
-        assert result == "update_available"
-
-    def test_sha_partial_match(self, updater):
-        """Test that partial SHA match doesn't count as up-to-date."""
-        updater.hf_client.get_commit_sha.return_value = "abc123def456"
-
-        result = updater.check_single_model("author/model", "abc123")
-
-        assert result == "update_available"
-
-
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])